@@ -2,22 +2,25 @@ import re
 import logging
 import time
 import random
-from typing import List
+from typing import Iterator, List
 
 import requests
 from bs4 import BeautifulSoup
+from parsing import make_soup
 from base_scraper import BaseIPTVScraper, IPTVChannel
+from transport import Transport
+from host_timeouts import observe_probe, probe_timeout
+from metrics import mark_failure
 from config import ALLINONE_HEADERS
 
 class AllinoneScraper(BaseIPTVScraper):
-    def __init__(self):
-        super().__init__()
-        self.session = requests.Session()
+    def __init__(self, transport: Transport | None = None):
+        super().__init__(transport)
         self.base_url = 'https://www.iptv-search.com'
         self.headers = ALLINONE_HEADERS
 
-    def _extract_channels_from_html(self, html: str) -> List[IPTVChannel]:
-        soup = BeautifulSoup(html, 'html.parser')
+    def _extract_channels_from_html(self, html: str | BeautifulSoup) -> List[IPTVChannel]:
+        soup = make_soup(html, self.parser_backend)
         channels = []
 
         for card in soup.find_all('div', class_='channel card'):
@@ -63,54 +66,75 @@ class AllinoneScraper(BaseIPTVScraper):
             pass
         return 1
 
-    def fetch_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> List[IPTVChannel]:
-        channels = []
+    def iter_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> Iterator[List[IPTVChannel]]:
         logging.info("开始提取频道信息")
         try:
-            url = f"{self.base_url}/search/?q={keyword}"
-            response = self.session.get(
-                url, 
-                headers=self.headers,
-                proxies=self.proxies if self.proxy_enabled else None
-            )
+            cached = self._get_cached_page(keyword, 1)
+            if cached is not None:
+                page_channels, meta = cached
+                max_pages = meta['max_pages']
+                logging.info(f"第 1 页命中搜索缓存，获取到 {len(page_channels)} 条数据，共 {max_pages} 页")
+            else:
+                url = f"{self.base_url}/search/?q={keyword}"
+                with self._stage('page_fetch'):
+                    response = self.session.get(
+                        url,
+                        headers=self.headers,
+                        proxies=self.proxies if self.proxy_enabled else None
+                    )
 
-            if response.status_code != 200:
-                logging.error(f"请求失败，状态码: {response.status_code}")
-                return channels
+                if response.status_code != 200:
+                    logging.error(f"请求失败，状态码: {response.status_code}")
+                    return
 
-            # 解析第一页
-            soup = BeautifulSoup(response.text, 'html.parser')
-            page_channels = self._extract_channels_from_html(response.text)
-            channels.extend(page_channels)
-            max_pages = self._get_max_pages(soup)
-            logging.info(f"第 1 页请求完毕，获取到 {len(page_channels)} 条数据，共 {max_pages} 页")
+                with self._stage('parse'):
+                    # 解析第一页，频道与总页数共用同一次解析结果
+                    soup = make_soup(response.text, self.parser_backend)
+                    page_channels = self._extract_channels_from_html(soup)
+                    max_pages = self._get_max_pages(soup)
+                self._put_cached_page(keyword, 1, page_channels, max_pages=max_pages)
+                logging.info(f"第 1 页请求完毕，获取到 {len(page_channels)} 条数据，共 {max_pages} 页")
+            yield page_channels
 
             # 处理分页
             if page_count > 1:
                 pages_to_fetch = self._get_target_pages(page_count, max_pages, random_mode)
                 logging.info(f"随机模式{'已' if random_mode else '未'}启用，将从 {max_pages} 页中{'随机' if random_mode else ''}抓取以下页面：{pages_to_fetch}")
 
+                missing_pages = []
                 for page in pages_to_fetch:
-                    page_url = f"{self.base_url}/search/?q={keyword}&page={page}"
-                    response = self.session.get(
-                        page_url, 
-                        headers=self.headers,
-                        proxies=self.proxies if self.proxy_enabled else None
-                    )
-                    
-                    if response.status_code == 200:
-                        page_channels = self._extract_channels_from_html(response.text)
-                        channels.extend(page_channels)
-                        logging.info(f"第 {page} 页请求完毕，获取到 {len(page_channels)} 条数据")  # 修改为与TonkiangScraper一致
+                    cached = self._get_cached_page(keyword, page)
+                    if cached is not None:
+                        logging.info(f"第 {page} 页命中搜索缓存，获取到 {len(cached[0])} 条数据")
+                        yield cached[0]
                     else:
+                        missing_pages.append(page)
+
+                def fetch_page(page: int):
+                    page_url = f"{self.base_url}/search/?q={keyword}&page={page}"
+                    with self._stage('page_fetch'):
+                        response = self.session.get(
+                            page_url,
+                            headers=self.headers,
+                            proxies=self.proxies if self.proxy_enabled else None
+                        )
+
+                    if response.status_code != 200:
                         logging.error(f"第 {page} 页请求失败，状态码: {response.status_code}")  # 修改为与TonkiangScraper一致
-                    time.sleep(random.uniform(0.5, 1.2))  # 添加随机延迟
+                        return None
+                    with self._stage('parse'):
+                        page_channels = self._extract_channels_from_html(response.text)
+                    self._put_cached_page(keyword, page, page_channels)
+                    logging.info(f"第 {page} 页请求完毕，获取到 {len(page_channels)} 条数据")  # 修改为与TonkiangScraper一致
+                    return page_channels
+
+                # 并发获取未缓存的页面，由令牌桶控制请求频率
+                for _, page_channels in self._iter_pages(missing_pages, fetch_page):
+                    yield page_channels
 
         except Exception as e:
             logging.exception(f"抓取过程中发生异常: {str(e)}")
 
-        return channels
-
     def check_channel_availability(self, channel: IPTVChannel) -> bool:
         """检查频道可用性"""
         try:
@@ -118,10 +142,12 @@ class AllinoneScraper(BaseIPTVScraper):
             response = self.session.get(
                 channel.url,
                 headers=self.headers,
-                timeout=(3.05, 4.5),
+                timeout=probe_timeout(channel.url),
                 proxies=self.proxies if self.proxy_enabled else None,
                 stream=True
             )
+            # 记录首字节耗时，用于调整该主机后续的超时
+            observe_probe(channel.url, response.elapsed.total_seconds())
 
             if response.status_code not in (200, 206):
                 logging.debug(f"无效响应[{response.status_code}]: {channel.url}")   
@@ -129,6 +155,7 @@ class AllinoneScraper(BaseIPTVScraper):
 
             chunk = response.raw.read(512, decode_content=True)
             if not chunk:
+                mark_failure('empty_body')
                 logging.debug(f"空数据响应: {channel.url}")   
                 return False
 
@@ -139,6 +166,10 @@ class AllinoneScraper(BaseIPTVScraper):
             response_time = time.time() - start_time
             channel.response_time = response_time
             return True
+        except requests.exceptions.Timeout as e:
+            observe_probe(channel.url, None)
+            logging.debug(f"连接超时 {channel.url}: {str(e)}")
+            return False
         except Exception as e:
             logging.debug(f"连接错误 {channel.url}: {str(e)}")   
             return False
@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import socket
+import ssl
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from config import PROBE_POOL_CONFIG
+from host_timeouts import observe_probe, probe_timeout
+
+# 响应体剩余部分不超过该字节数时读完并保留连接，否则关闭连接
+_DRAIN_LIMIT = 64 * 1024
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+def _parse_status(status_line: bytes) -> int:
+    """解析状态行中的状态码，格式错误（如非HTTP服务的响应）时抛出ValueError"""
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith(b'HTTP/') or not parts[1].isdigit():
+        raise ValueError(f"无效的HTTP状态行: {status_line[:64]!r}")
+    return int(parts[1])
+
+
+class ConnectTimeout(Exception):
+    """建立连接（含代理隧道与TLS握手）超时，与requests的ConnectTimeout一样归为连接失败"""
+
+
+class AsyncProber:
+    """基于asyncio流的轻量HTTP探测器，单个事件循环内可同时维持大量探测；
+    未指定timeout时按主机的历史耗时使用自适应超时。
+    响应长度已知且剩余部分较小时按主机保留长连接，后续探测直接复用，用完需调用close"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, timeout: Optional[Tuple[float, float]] = None,
+                 read_bytes: int = 512, max_redirects: int = 3, proxies: Optional[Dict[str, str]] = None,
+                 verify: bool = True):
+        self.headers = {
+            key: value for key, value in (headers or {}).items()
+            if key.lower() in ('user-agent', 'accept', 'accept-language')
+        }
+        self.timeout = timeout
+        self.read_bytes = read_bytes
+        self.max_redirects = max_redirects
+        self.proxy = self._parse_proxy(proxies)
+        self.ssl_context = ssl.create_default_context()
+        if not verify:
+            self.ssl_context.check_hostname = False
+            self.ssl_context.verify_mode = ssl.CERT_NONE
+        # (协议, 主机, 端口) -> 空闲连接，按最近使用排序，超出pool_hosts时关闭最久未用主机的连接
+        self._idle: 'OrderedDict[Tuple[str, str, int], List[_Connection]]' = OrderedDict()
+
+    @staticmethod
+    def supports_proxies(proxies: Optional[Dict[str, str]]) -> bool:
+        """异步引擎仅支持HTTP代理"""
+        if not proxies:
+            return True
+        return all(value.startswith('http://') for value in proxies.values())
+
+    @staticmethod
+    def _parse_proxy(proxies: Optional[Dict[str, str]]) -> Optional[Tuple[str, int]]:
+        if not proxies or not proxies.get('http'):
+            return None
+        parts = urlsplit(proxies['http'])
+        return parts.hostname, parts.port or 8080
+
+    async def probe(self, url: str) -> Optional[float]:
+        """探测URL，可用时返回响应时间，否则返回None"""
+        response_time, _ = await self.probe_outcome(url)
+        return response_time
+
+    async def probe_outcome(self, url: str) -> Tuple[Optional[float], str]:
+        """探测URL，返回 (响应时间, 结果)，结果为ok或失败类型（见metrics.FAILURE_CLASSES）"""
+        start_time = time.time()
+        try:
+            for _ in range(self.max_redirects + 1):
+                status, location, chunk = await self._fetch(url)
+                if status in (301, 302, 303, 307, 308) and location:
+                    url = urljoin(url, location)
+                    continue
+                if status not in (200, 206):
+                    logging.debug(f"无效响应[{status}]: {url}")
+                    return None, 'http_status'
+                if not chunk:
+                    logging.debug(f"空数据响应: {url}")
+                    return None, 'empty_body'
+                if b'#EXTM3U' in chunk[:128]:
+                    logging.debug(f"检测到M3U8文件: {url}")
+                return time.time() - start_time, 'ok'
+            logging.debug(f"重定向次数过多: {url}")
+            return None, 'http_status'
+        except ConnectTimeout:
+            if self.timeout is None:
+                observe_probe(url, None)
+            logging.debug(f"连接超时 {url}")
+            return None, 'connect'
+        except asyncio.TimeoutError:
+            if self.timeout is None:
+                observe_probe(url, None)
+            logging.debug(f"读取超时 {url}")
+            return None, 'timeout'
+        except socket.gaierror as e:
+            logging.debug(f"域名解析失败 {url}: {str(e)}")
+            return None, 'dns'
+        except (OSError, ssl.SSLError) as e:
+            logging.debug(f"连接错误 {url}: {str(e)}")
+            return None, 'connect'
+        except ValueError as e:
+            logging.debug(f"连接错误 {url}: {str(e)}")
+            return None, 'other'
+
+    def close(self) -> None:
+        """关闭所有空闲连接"""
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+    def _acquire(self, key: Tuple[str, str, int]) -> Optional[_Connection]:
+        connections = self._idle.get(key)
+        while connections:
+            reader, writer = connections.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, key: Tuple[str, str, int], connection: _Connection) -> None:
+        connections = self._idle.setdefault(key, [])
+        self._idle.move_to_end(key)
+        if len(connections) >= PROBE_POOL_CONFIG['per_host_limit']:
+            connection[1].close()
+            return
+        connections.append(connection)
+        while len(self._idle) > PROBE_POOL_CONFIG['pool_hosts']:
+            _, stale = self._idle.popitem(last=False)
+            for _, writer in stale:
+                writer.close()
+
+    async def _connect(self, scheme: str, host: str, port: int, connect_timeout: float,
+                       read_timeout: float) -> _Connection:
+        try:
+            if not self.proxy:
+                return await asyncio.wait_for(
+                    asyncio.open_connection(
+                        host, port,
+                        ssl=self.ssl_context if scheme == 'https' else None,
+                        server_hostname=host if scheme == 'https' else None,
+                    ),
+                    connect_timeout,
+                )
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(*self.proxy), connect_timeout
+            )
+            if scheme == 'https':
+                try:
+                    await self._open_tunnel(reader, writer, host, port, read_timeout)
+                    await asyncio.wait_for(
+                        writer.start_tls(self.ssl_context, server_hostname=host), connect_timeout
+                    )
+                except BaseException:
+                    writer.close()
+                    raise
+            return reader, writer
+        except asyncio.TimeoutError as e:
+            raise ConnectTimeout(f"连接超时: {host}:{port}") from e
+
+    async def _fetch(self, url: str) -> Tuple[int, Optional[str], bytes]:
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"不支持的协议: {scheme}")
+
+        host = parts.hostname
+        port = parts.port or (443 if scheme == 'https' else 80)
+        connect_timeout, read_timeout = self.timeout or probe_timeout(url)
+        pool_key = (scheme, host, port)
+
+        target = parts.path or '/'
+        if parts.query:
+            target += f'?{parts.query}'
+        if self.proxy and scheme == 'http':
+            target = url
+        host_header = host if parts.port is None else f'{host}:{port}'
+        lines = [f'GET {target} HTTP/1.1', f'Host: {host_header}']
+        lines += [f'{key}: {value}' for key, value in self.headers.items()]
+        lines += ['Accept-Encoding: identity', 'Connection: keep-alive', '', '']
+        request = '\r\n'.join(lines).encode('latin-1')
+
+        connection = self._acquire(pool_key)
+        while True:
+            reused = connection is not None
+            connect_start = time.time()
+            if connection is None:
+                connection = await self._connect(scheme, host, port, connect_timeout, read_timeout)
+            reader, writer = connection
+            connect_elapsed = None if reused else time.time() - connect_start
+            keep = False
+            try:
+                writer.write(request)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), read_timeout)
+                if not status_line:
+                    raise ConnectionResetError("连接已被服务器关闭")
+            except (ConnectionError, ssl.SSLError):
+                writer.close()
+                if not reused:
+                    raise
+                # 复用的空闲连接可能已被服务器关闭，换新连接重试一次
+                connection = None
+                continue
+            except BaseException:
+                writer.close()
+                raise
+            break
+
+        try:
+            if self.timeout is None:
+                # 经代理连接时测得的是到代理的耗时，不计入目标主机的连接耗时
+                observe_probe(url, time.time() - connect_start, None if self.proxy else connect_elapsed)
+            status = _parse_status(status_line)
+            location = None
+            length = None
+            persistent = status_line.startswith(b'HTTP/1.1')
+            while True:
+                line = await asyncio.wait_for(reader.readline(), read_timeout)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                name = name.strip().lower()
+                if name == 'location':
+                    location = value.strip()
+                elif name == 'content-length' and value.strip().isdigit():
+                    length = int(value.strip())
+                elif name == 'transfer-encoding' or (name == 'connection' and 'close' in value.lower()):
+                    persistent = False
+
+            chunk = b''
+            if status in (200, 206):
+                size = self.read_bytes if length is None else min(self.read_bytes, length)
+                if size:
+                    chunk = await asyncio.wait_for(reader.read(size), read_timeout)
+            # 只有响应长度已知时才能确定本次响应的结束位置，剩余部分较小时读完以便复用连接
+            if persistent and length is not None and length - len(chunk) <= _DRAIN_LIMIT:
+                try:
+                    await asyncio.wait_for(reader.readexactly(length - len(chunk)), read_timeout)
+                    keep = True
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+                    pass
+            return status, location, chunk
+        finally:
+            if keep:
+                self._release(pool_key, connection)
+            else:
+                writer.close()
+
+    async def _open_tunnel(self, reader, writer, host: str, port: int, read_timeout: float) -> None:
+        writer.write(f'CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n\r\n'.encode('latin-1'))
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), read_timeout)
+        if _parse_status(status_line) != 200:
+            raise OSError(f"代理隧道建立失败: {status_line.decode('latin-1').strip()}")
+        while await asyncio.wait_for(reader.readline(), read_timeout) not in (b'\r\n', b'\n', b''):
+            pass
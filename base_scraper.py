@@ -1,46 +1,154 @@
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, ContextManager, List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import requests
+
+from config import SEARCH_CACHE_CONFIG, PAGE_FETCH_WORKERS, HTML_PARSER_BACKEND
+from metrics import stage
+from rate_limiter import get_rate_limiter
+from search_cache import CHANNEL_FIELDS, get_default_search_cache
+from transport import Transport, get_default_transport
 
-@dataclass
 class IPTVChannel:
-    def __init__(self, url, channel_name="", **kwargs):
+    """频道记录，使用__slots__避免每个实例的__dict__，大批量抓取时显著降低内存占用"""
+    __slots__ = ('url', 'channel_name', 'date', 'location', 'resolution', 'response_time', 'source',
+                 'throughput', 'bandwidth')
+
+    # 导出字段及顺序
+    EXPORT_FIELDS = ('channel_name', 'url', 'date', 'location', 'resolution', 'response_time',
+                     'throughput', 'bandwidth')
+
+    def __init__(self, url: str, channel_name: str = "", date: Optional[str] = None,
+                 location: Optional[str] = None, resolution: Optional[str] = None,
+                 response_time: Optional[float] = None, source: Optional[str] = None):
         self.url = url
         self.channel_name = channel_name
-        self.name = channel_name
-        self.date: Optional[str] = None
-        self.location: Optional[str] = None
-        self.resolution: Optional[str] = None
-        self.response_time: Optional[float] = None
+        self.date = date
+        self.location = location
+        self.resolution = resolution
+        self.response_time = response_time
+        self.source = source
+        # 深度测速结果：实测吞吐量与播放列表声明的码率，单位bps
+        self.throughput: Optional[float] = None
+        self.bandwidth: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        """channel_name的别名，兼容旧代码"""
+        return self.channel_name
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可序列化的字典"""
+        return {field: getattr(self, field) for field in self.EXPORT_FIELDS}
+
+    def __repr__(self) -> str:
+        return f"IPTVChannel(channel_name={self.channel_name!r}, url={self.url!r})"
 
 class BaseIPTVScraper(ABC):
-    def __init__(self):
-        self.session = None
-        self.proxies = None
-        self.proxy_enabled = False
+    def __init__(self, transport: Optional[Transport] = None):
+        # 连接池、重试策略与代理由传输层统一管理，默认所有抓取器共用一个
+        self.transport = transport or get_default_transport()
+        self.search_cache = get_default_search_cache() if SEARCH_CACHE_CONFIG['enabled'] else None
+        self.parser_backend = HTML_PARSER_BACKEND
 
     @abstractmethod
-    def fetch_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> List[IPTVChannel]:
-        """获取频道列表的抽象方法"""
+    def iter_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> Iterator[List[IPTVChannel]]:
+        """逐页产出频道列表的抽象方法，便于测速与抓取同时进行"""
         pass
 
+    def fetch_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> List[IPTVChannel]:
+        """获取完整的频道列表"""
+        channels = []
+        for page_channels in self.iter_channels(keyword, page_count, random_mode):
+            channels.extend(page_channels)
+        return channels
+
     @abstractmethod
     def check_channel_availability(self, channel: IPTVChannel) -> bool:
         """检查频道可用性的抽象方法"""
         pass
 
+    def supports_async_probe(self) -> bool:
+        """异步测速不调用check_channel_availability，而是统一按200/206且响应体非空判定可用；
+        检测逻辑与此不同的抓取器返回False，测速时改用线程模式以保证两种模式结果一致"""
+        return True
+
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的Session，可在多个线程中同时使用"""
+        return self.transport.session
+
+    @property
+    def proxies(self) -> Optional[Dict[str, str]]:
+        return self.transport.proxies
+
+    @property
+    def proxy_enabled(self) -> bool:
+        return self.transport.proxy_enabled
+
     def set_proxy(self, proxy_url: str, proxy_type: str = 'http') -> None:
-        """设置代理服务器"""
-        if not proxy_url:
-            self.proxy_enabled = False
-            self.proxies = None
+        """设置代理服务器，作用于共用同一传输层的所有抓取器"""
+        self.transport.set_proxy(proxy_url, proxy_type)
+
+    def _get_cached_page(self, keyword: str, page: int) -> Optional[Tuple[List[IPTVChannel], Dict[str, Any]]]:
+        """从搜索缓存读取某一页的频道，每次返回新的频道对象"""
+        if self.search_cache is None:
+            return None
+        cached = self.search_cache.get(self.name, keyword, page)
+        if cached is None:
+            return None
+        items, meta = cached
+        return [IPTVChannel(**item) for item in items], meta
+
+    def _put_cached_page(self, keyword: str, page: int, channels: List[IPTVChannel], **meta) -> None:
+        if self.search_cache is None:
+            return
+        items = [{field: getattr(channel, field) for field in CHANNEL_FIELDS} for channel in channels]
+        self.search_cache.put(self.name, keyword, page, items, **meta)
+
+    def _iter_pages(self, pages: Iterable[int],
+                    fetch_page: Callable[[int], Optional[List[IPTVChannel]]]) -> Iterator[Tuple[int, List[IPTVChannel]]]:
+        """并发抓取多个页面，每次请求前从数据源的令牌桶获取令牌，按pages的顺序产出 (页码, 频道列表)，
+        请求失败的页面跳过。fetch_page自行以page_fetch、parse标记请求与解析，与第一页的计时方式一致"""
+        pages = list(pages)
+        if not pages:
             return
+        rate_limiter = get_rate_limiter(self.name)
+
+        def limited_fetch(page: int) -> Optional[List[IPTVChannel]]:
+            rate_limiter.acquire()
+            try:
+                return fetch_page(page)
+            except Exception as e:
+                logging.error(f"第 {page} 页请求异常: {str(e)}")
+                return None
+
+        # 不使用with语句：调用方提前关闭生成器（如测速到达时间预算）时不等待仍在抓取的页面
+        executor = ThreadPoolExecutor(max_workers=min(PAGE_FETCH_WORKERS, len(pages)))
+        try:
+            futures = {executor.submit(limited_fetch, page): index for index, page in enumerate(pages)}
+            # 先完成的后续页面暂存，等前面的页面完成后按顺序产出
+            completed: Dict[int, Optional[List[IPTVChannel]]] = {}
+            next_index = 0
+            for future in as_completed(futures):
+                completed[futures[future]] = future.result()
+                while next_index in completed:
+                    result = completed.pop(next_index)
+                    if result is not None:
+                        yield pages[next_index], result
+                    next_index += 1
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _stage(self, name: str) -> ContextManager[None]:
+        """标记当前所处的阶段（city_lookup、page_fetch、parse、probe），期间的请求与耗时计入本数据源"""
+        return stage(self.name, name)
 
-        self.proxies = {
-            'http': f'{proxy_type}://{proxy_url}',
-            'https': f'{proxy_type}://{proxy_url}'
-        }
-        self.proxy_enabled = True
+    def source_name(self, channel: IPTVChannel) -> str:
+        """测速指标中频道所属的数据源"""
+        return self.name
 
     @property
     def name(self) -> str:
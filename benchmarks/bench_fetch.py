@@ -0,0 +1,95 @@
+import argparse
+import json
+import logging
+import statistics
+import time
+from typing import Dict, List
+
+from benchmarks.fixtures import Fixtures
+from benchmarks.replay_server import ReplayServer
+from bootstrap import SCRAPER_CLASSES
+from config import RATE_LIMIT_CONFIG
+from transport import Transport
+
+# 针对回放服务器测量各抓取器 fetch_channels 的端到端吞吐量：
+#   python -m benchmarks.bench_fetch --pages 5 --per-page 30 --latency 0.05 --repeat 5
+
+
+def bench_scraper(name: str, server: ReplayServer, keyword: str, pages: int, repeat: int) -> Dict:
+    """对单个抓取器重复执行fetch_channels，返回耗时与请求统计"""
+    source = name.lower()
+    transport = Transport()
+    scraper = SCRAPER_CLASSES[name](transport)
+    scraper.base_url = server.base_url(source)
+    # 每轮都必须真正发出请求
+    scraper.search_cache = None
+
+    timings: List[float] = []
+    channel_counts: List[int] = []
+    server.reset_stats()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        channels = scraper.fetch_channels(keyword, pages, random_mode=False)
+        timings.append(time.perf_counter() - start)
+        channel_counts.append(len(channels))
+    transport.close()
+
+    total_time = sum(timings)
+    return {
+        'source': name,
+        'runs': repeat,
+        'channels': channel_counts[-1],
+        'requests': server.requests[source] / repeat,
+        'bytes': server.bytes_sent[source] / repeat,
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'channels_per_sec': sum(channel_counts) / total_time if total_time else 0.0,
+        'requests_per_sec': server.requests[source] / total_time if total_time else 0.0,
+    }
+
+
+def print_report(results: List[Dict]) -> None:
+    header = f"{'数据源':<10}{'频道数':>8}{'请求数':>8}{'KB/轮':>10}{'最快(s)':>10}{'中位(s)':>10}{'频道/s':>10}{'请求/s':>10}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['source']:<10}{r['channels']:>8}{r['requests']:>8.1f}{r['bytes'] / 1024:>10.1f}"
+              f"{r['best']:>10.3f}{r['median']:>10.3f}{r['channels_per_sec']:>10.1f}{r['requests_per_sec']:>10.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='各抓取器fetch_channels的离线吞吐量基准测试')
+    parser.add_argument('-s', '--source', action='append', choices=list(SCRAPER_CLASSES),
+                        help='要测试的数据源，可多次指定，默认全部')
+    parser.add_argument('-k', '--keyword', default='北京')
+    parser.add_argument('--pages', type=int, default=5, help='抓取页数（同时也是替身页面的总页数）')
+    parser.add_argument('--per-page', type=int, default=30, help='每页频道数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个数据源重复次数')
+    parser.add_argument('--recordings', help='录制页面目录，按 <数据源>/page_N.html 存放')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟的上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='注入错误的概率')
+    parser.add_argument('--error-status', type=int, default=503, help='注入的状态码，0表示断开连接')
+    parser.add_argument('--no-rate-limit', action='store_true', help='不受数据源令牌桶限速，只测抓取与解析本身')
+    parser.add_argument('--json', help='将结果写入JSON文件')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    sources = args.source or list(SCRAPER_CLASSES)
+    if args.no_rate_limit:
+        for name in sources:
+            RATE_LIMIT_CONFIG[SCRAPER_CLASSES[name].__name__] = {'rate': 1e6, 'burst': 1_000_000}
+
+    fixtures = Fixtures(per_page=args.per_page, pages=args.pages, recordings=args.recordings)
+    with ReplayServer(fixtures=fixtures, latency=args.latency, jitter=args.jitter,
+                      error_rate=args.error_rate, error_status=args.error_status, seed=0) as server:
+        results = [bench_scraper(name, server, args.keyword, args.pages, args.repeat) for name in sources]
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import logging
+import sys
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from base_scraper import IPTVChannel
+from benchmarks.replay_server import ReplayServer
+from config import RATE_LIMIT_CONFIG
+from speed_tester import SpeedTester
+from tonkiang_scraper import TonkiangScraper
+from transport import Transport
+
+# 测量测速在找到limit个可用地址后多久停止：抓取端每隔gap秒才产出一批频道，
+# 停止时间应只取决于在途探测，而不是下一批频道何时抓取完成：
+#   python -m benchmarks.bench_limit --limit 5 --latency 0.2 --gap 2
+# 超过一个探测耗时仍未停止时退出码为1
+
+_SLACK = 0.1
+
+
+def slow_batches(server: ReplayServer, count: int, size: int, gap: float) -> Iterator[List[IPTVChannel]]:
+    """模拟逐页抓取：每批之间等待gap秒"""
+    for batch in range(count):
+        if batch:
+            time.sleep(gap)
+        yield [IPTVChannel(f'{server.url}/stream/limit/{batch}-{i}.m3u8', f'频道{i}') for i in range(size)]
+
+
+def bench_mode(mode: str, server: ReplayServer, limit: int, batches: int, batch_size: int, gap: float,
+               max_workers: int) -> Dict:
+    """运行一次流水线测速，返回到达limit的耗时、之后到测速返回的耗时与探测统计"""
+    transport = Transport()
+    scraper = TonkiangScraper(transport)
+    lock = threading.Lock()
+    found = 0
+    limit_time = None
+
+    def on_result(channels: List[IPTVChannel]) -> None:
+        nonlocal found, limit_time
+        with lock:
+            found += 1
+            if found == limit and limit_time is None:
+                limit_time = time.perf_counter()
+
+    tester = SpeedTester(scraper, mode=mode, use_cache=False, prioritize=False, limit=limit,
+                         result_callback=on_result)
+    server.reset_stats()
+    start = time.perf_counter()
+    accessible, stats = tester.test_stream(slow_batches(server, batches, batch_size, gap), max_workers)
+    end = time.perf_counter()
+    transport.close()
+    return {
+        'mode': stats['mode'],
+        'limit_reached': stats['limit_reached'],
+        'to_limit': (limit_time or end) - start,
+        'overrun': end - (limit_time or end),
+        'elapsed': end - start,
+        'accessible': len(accessible),
+        'probes': server.requests['stream'],
+        'aborted': stats['aborted'],
+        'skipped': stats['skipped'],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='测速在达到limit后的停止时间')
+    parser.add_argument('--mode', action='append', choices=list(SpeedTester.MODES), help='测速模式，默认全部')
+    parser.add_argument('--limit', type=int, default=5, help='需要的可用地址数')
+    parser.add_argument('--latency', type=float, default=0.2, help='每个探测请求的延迟（秒）')
+    parser.add_argument('--batches', type=int, default=5, help='抓取的批次数')
+    parser.add_argument('--batch-size', type=int, default=20, help='每批频道数')
+    parser.add_argument('--gap', type=float, default=2.0, help='批次之间的抓取耗时（秒）')
+    parser.add_argument('--max-workers', type=int, default=8, help='线程模式的并发数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    RATE_LIMIT_CONFIG[TonkiangScraper.__name__] = {'rate': 1e6, 'burst': 1_000_000}
+    header = f"{'模式':<8}{'到达limit(s)':>14}{'超出(s)':>10}{'总耗时(s)':>12}{'可用数':>8}{'探测数':>8}{'中断数':>8}{'跳过数':>8}"
+    print(header)
+    print('-' * len(header))
+    failures = []
+    with ReplayServer(latency=args.latency) as server:
+        for mode in args.mode or list(SpeedTester.MODES):
+            r = bench_mode(mode, server, args.limit, args.batches, args.batch_size, args.gap, args.max_workers)
+            print(f"{r['mode']:<8}{r['to_limit']:>14.2f}{r['overrun']:>10.2f}{r['elapsed']:>12.2f}"
+                  f"{r['accessible']:>8}{r['probes']:>8}{r['aborted']:>8}{r['skipped']:>8}")
+            if not r['limit_reached']:
+                failures.append(f"{mode}: 未达到limit={args.limit}")
+            elif r['overrun'] > args.latency + _SLACK:
+                failures.append(f"{mode}: 达到limit后 {r['overrun']:.2f} 秒才停止，超过一个探测的耗时 {args.latency} 秒")
+
+    if failures:
+        print('\n'.join(failures))
+        sys.exit(1)
+    print("各模式均在达到limit后一个探测耗时内停止")
+
+
+if __name__ == '__main__':
+    main()
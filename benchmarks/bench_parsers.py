@@ -0,0 +1,141 @@
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.fixtures import Fixtures
+from allinone_scraper import AllinoneScraper
+from base_scraper import IPTVChannel
+from hacks_scraper import HacksScraper
+from iptv365_scraper import STREAM_CHUNK_SIZE, IPTV365Scraper
+from json_stream import iter_json_array
+from parsing import HAS_LXML
+from tonkiang_scraper import TonkiangScraper
+
+# 解析函数的微基准：在小、常规、超大三种页面上测量页/秒、频道/秒与峰值内存，
+# 并确认各解析后端得到完全相同的频道列表：
+#   python -m benchmarks.bench_parsers --repeat 20
+
+CORPUS_SIZES = {'small': 5, 'typical': 30, 'pathological': 3000}
+_STREAM_BASE = 'http://127.0.0.1:8800'
+_KEYWORD = '北京'
+
+
+def _parse_iptv365(scraper: IPTV365Scraper, content: bytes) -> List[IPTVChannel]:
+    """与_iter_sources相同：分块增量解析JSON，再逐行拆分"""
+    chunks = (content[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(content), STREAM_CHUNK_SIZE))
+    channels = []
+    for source in iter_json_array(chunks):
+        for line in source.get('lines', []):
+            channel = scraper._parse_line(line)
+            if channel:
+                channels.append(channel)
+    return channels
+
+
+def build_parsers() -> Dict[str, Tuple[object, Callable]]:
+    """数据源 -> (抓取器, 以页面内容为参数的解析函数)"""
+    tonkiang, allinone, hacks, iptv365 = TonkiangScraper(), AllinoneScraper(), HacksScraper(), IPTV365Scraper()
+    return {
+        'Tonkiang': (tonkiang, lambda content: tonkiang._extract_channels_from_html(content.decode('utf-8'))),
+        'Allinone': (allinone, lambda content: allinone._extract_channels_from_html(content.decode('utf-8'))),
+        'Hacks': (hacks, lambda content: hacks._parse_api_response(content.decode('utf-8'))),
+        'IPTV365': (iptv365, lambda content: _parse_iptv365(iptv365, content)),
+    }
+
+
+def build_corpus(per_page: int, recordings: str | None = None) -> Dict[str, bytes]:
+    """每个数据源一页内容，IPTV365为单页返回所有订阅源"""
+    fixtures = Fixtures(per_page=per_page, pages=1, recordings=recordings)
+    return {
+        'Tonkiang': fixtures.tonkiang_page(_KEYWORD, 1, 'a1b2c3d4e5f6', _STREAM_BASE),
+        'Allinone': fixtures.allinone_page(_KEYWORD, 1, _STREAM_BASE),
+        'Hacks': fixtures.hacks_page(_KEYWORD, _STREAM_BASE),
+        'IPTV365': fixtures.iptv365_sources(_KEYWORD, _STREAM_BASE),
+    }
+
+
+def time_parser(parse: Callable, content: bytes, repeat: int) -> Tuple[float, int]:
+    """返回 (单页最快耗时, 频道数)"""
+    best = float('inf')
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        channels = parse(content)
+        best = min(best, time.perf_counter() - start)
+        count = len(channels)
+    return best, count
+
+
+def peak_memory(parse: Callable, content: bytes) -> int:
+    """单次解析的峰值内存分配（字节），单独运行以免影响计时"""
+    tracemalloc.start()
+    try:
+        parse(content)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare_backends(scraper, parse: Callable, content: bytes, backends: List[str]) -> List[str]:
+    """用各解析后端解析同一页面，返回与第一个后端结果不同的后端"""
+    original = scraper.parser_backend
+    results = {}
+    try:
+        for backend in backends:
+            scraper.parser_backend = backend
+            results[backend] = [channel.to_dict() for channel in parse(content)]
+    finally:
+        scraper.parser_backend = original
+    reference = results[backends[0]]
+    return [backend for backend in backends[1:] if results[backend] != reference]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='频道解析函数的微基准测试')
+    parser.add_argument('-s', '--source', action='append', choices=['Tonkiang', 'Allinone', 'Hacks', 'IPTV365'],
+                        help='要测试的数据源，可多次指定，默认全部')
+    parser.add_argument('--size', action='append', choices=list(CORPUS_SIZES), help='页面规模，默认全部')
+    parser.add_argument('--repeat', type=int, default=10, help='每个页面的解析次数，取最快一次')
+    parser.add_argument('--backend', action='append', choices=['html.parser', 'lxml'],
+                        help='参与计时的解析后端，默认为已安装的全部后端')
+    parser.add_argument('--recordings', help='录制页面目录，存在时替代生成的页面')
+    args = parser.parse_args()
+
+    parsers = build_parsers()
+    sources = args.source or list(parsers)
+    sizes = args.size or list(CORPUS_SIZES)
+    backends = args.backend or (['html.parser', 'lxml'] if HAS_LXML else ['html.parser'])
+
+    header = f"{'数据源':<10}{'规模':<14}{'后端':<13}{'频道数':>8}{'页/s':>10}{'频道/s':>12}{'峰值内存(KB)':>14}"
+    print(header)
+    print('-' * len(header))
+    mismatches = []
+    for size in sizes:
+        corpus = build_corpus(CORPUS_SIZES[size], args.recordings)
+        for source in sources:
+            scraper, parse = parsers[source]
+            content = corpus[source]
+            # IPTV365返回JSON，与HTML解析后端无关
+            source_backends = backends if source != 'IPTV365' else ['-']
+            for backend in source_backends:
+                if backend != '-':
+                    scraper.parser_backend = backend
+                elapsed, count = time_parser(parse, content, args.repeat)
+                peak = peak_memory(parse, content)
+                print(f"{source:<10}{size:<14}{backend:<13}{count:>8}{1 / elapsed:>10.1f}"
+                      f"{count / elapsed:>12.0f}{peak / 1024:>14.1f}")
+            if len(source_backends) > 1:
+                for backend in compare_backends(scraper, parse, content, source_backends):
+                    mismatches.append(f"{source}/{size}: {backend} 与 {source_backends[0]} 的解析结果不一致")
+
+    if mismatches:
+        print('\n'.join(mismatches))
+        sys.exit(1)
+    if len(backends) > 1:
+        print(f"各解析后端结果一致: {', '.join(backends)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import json
+import os
+import random
+from html import escape
+from typing import Dict, List, Optional, Tuple
+
+# 回放服务器与基准测试使用的页面，结构与各数据源的真实页面一致。
+# 默认按固定种子生成，也可以从录制目录读取真实页面覆盖
+
+SOURCES = ('tonkiang', 'allinone', 'hacks', 'iptv365')
+
+_CHANNEL_NAMES = ('CCTV1', 'CCTV2', 'CCTV5+', 'CCTV13', '湖南卫视', '浙江卫视', '东方卫视', '北京卫视',
+                  '广东体育', '凤凰中文', 'CGTN', '深圳卫视')
+_LOCATIONS = ('北京联通', '上海电信', '广东移动', '浙江电信', '湖南联通', '四川电信')
+_RESOLUTIONS = ('1920x1080', '1280x720', '720x576', '3840x2160')
+
+
+class Fixtures:
+    """生成各数据源的搜索结果页面，per_page为每页频道数，pages为总页数"""
+
+    def __init__(self, per_page: int = 30, pages: int = 5, seed: int = 0,
+                 recordings: Optional[str] = None):
+        self.per_page = per_page
+        self.pages = pages
+        self.seed = seed
+        self.recordings = recordings
+
+    def _channels(self, source: str, keyword: str, page: int, stream_base: str) -> List[Tuple[str, str, str, str, str]]:
+        """返回 [(频道名, 地址, 日期, 地区, 分辨率)]，同一页每次生成的内容相同"""
+        rng = random.Random(f'{self.seed}-{source}-{keyword}-{page}')
+        channels = []
+        for i in range(self.per_page):
+            name = rng.choice(_CHANNEL_NAMES)
+            url = f'{stream_base}/stream/{source}/{page}-{i}.m3u8'
+            date = f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}'
+            channels.append((name, url, date, rng.choice(_LOCATIONS), rng.choice(_RESOLUTIONS)))
+        return channels
+
+    def recorded(self, source: str, name: str) -> Optional[bytes]:
+        """读取录制目录中的页面，如 recordings/tonkiang/page_2.html"""
+        if not self.recordings:
+            return None
+        path = os.path.join(self.recordings, source, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def tonkiang_page(self, keyword: str, page: int, l_param: str, stream_base: str) -> bytes:
+        recorded = self.recorded('tonkiang', f'page_{page}.html')
+        if recorded is not None:
+            return recorded
+        parts = ['<html><body><div class="tables">']
+        for name, url, date, location, resolution in self._channels('tonkiang', keyword, page, stream_base):
+            parts.append(
+                '<div class="resultplus">'
+                f'<div class="channel"><a href="#"><div class="tip" data-title="{escape(name)}">{escape(name)}</div></a></div>'
+                f'<div class="m3u8"><table><tr><td><tba class="ergl">{escape(url)}</tba></td></tr></table></div>'
+                f'<div style="font-size: 10px; color: #aaa;">{date} {location} • {resolution} </div>'
+                '</div>'
+            )
+        parts.append('</div><div class="pagination">')
+        for number in range(1, self.pages + 1):
+            parts.append(f'<a href="?page={number}&iptv={escape(keyword)}&l={l_param}">{number}</a>')
+        parts.append('</div></body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    def allinone_page(self, keyword: str, page: int, stream_base: str) -> bytes:
+        recorded = self.recorded('allinone', f'page_{page}.html')
+        if recorded is not None:
+            return recorded
+        parts = ['<html><body><div class="channels">']
+        for name, url, date, location, resolution in self._channels('allinone', keyword, page, stream_base):
+            parts.append(
+                '<div class="channel card">'
+                f'<div class="channel-header"><div class="channel-name">{escape(name)}</div></div>'
+                f'<div class="channel-link"><span class="link-text">{escape(url)}</span></div>'
+                f'<div class="channel-meta"><span class="date-text">{date}</span>'
+                f'<span class="location-tag">{location}</span>'
+                f'<span class="resolution-text" title="{resolution}">{resolution.split("x")[-1]}p</span></div>'
+                '</div>'
+            )
+        parts.append(f'</div><form><input type="number" name="page" min="1" max="{self.pages}" value="{page}"></form>')
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    def hacks_page(self, keyword: str, stream_base: str) -> bytes:
+        recorded = self.recorded('hacks', 'search.html')
+        if recorded is not None:
+            return recorded
+        parts = ['<html><body><nav>IPTV Search</nav><table><tr><th>Name</th><th>Resolution</th><th>Format</th>'
+                 '<th>Checked</th><th>Streams</th><th>Source</th></tr>']
+        channels = self._channels('hacks', keyword, 1, stream_base)
+        # 同名频道合并在一行，与真实页面一致
+        for index in range(0, len(channels), 2):
+            group = channels[index:index + 2]
+            name, _, date, _, resolution = group[0]
+            links = ''.join(f'<a class="stream_url" href="#" title="{escape(url)}">#{i + 1}</a>'
+                            for i, (_, url, _, _, _) in enumerate(group))
+            parts.append(f'<tr><td>{escape(name)}</td><td>{resolution}</td><td>m3u8</td><td>{date}</td>'
+                         f'<td>{links}</td><td>github</td></tr>')
+        parts.append('</table></body></html>')
+        return ''.join(parts).encode('utf-8')
+
+    def iptv365_sources(self, keyword: str, stream_base: str) -> bytes:
+        recorded = self.recorded('iptv365', 'search.json')
+        if recorded is not None:
+            return recorded
+        sources: List[Dict] = []
+        for page in range(1, self.pages + 1):
+            lines = [f'{name},{url}${location}'
+                     for name, url, _, location, _ in self._channels('iptv365', keyword, page, stream_base)]
+            sources.append({'url': f'https://example.com/iptv{page}.m3u', 'lines': lines})
+        return json.dumps(sources, ensure_ascii=False).encode('utf-8')
+
+
+def stream_playlist(segment_count: int = 3) -> bytes:
+    """测速地址返回的直播m3u8"""
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:6', '#EXT-X-MEDIA-SEQUENCE:1']
+    for i in range(segment_count):
+        lines.extend(['#EXTINF:6.0,', f'segment{i}.ts'])
+    return ('\n'.join(lines) + '\n').encode('utf-8')
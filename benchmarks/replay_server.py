@@ -0,0 +1,195 @@
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.fixtures import SOURCES, Fixtures, stream_playlist
+
+# 本地替身服务器：按各数据源的路径与参数返回固定页面，用于离线基准测试与回归测试。
+# 四个数据源共用一个端口，以路径前缀区分：
+#   /tonkiang/ga.php、POST /tonkiang、/tonkiang/?page=N&iptv=...&l=...
+#   /allinone/search/?q=...&page=N
+#   /hacks/api/search?query=...
+#   POST /iptv365/
+#   /stream/<数据源>/<编号>.m3u8 及其分片，供测速使用
+
+_L_PARAM = 'a1b2c3d4e5f6'
+_CITY = 'ZZZZZZZZZZ'
+_SEGMENT = b'\x47' + b'\x00' * 187
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """latency为每个请求的固定延迟（秒），jitter为额外的随机延迟上限，
+    error_rate为注入错误的概率，error_status为注入的状态码，0表示直接断开连接"""
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int] = ('127.0.0.1', 0), fixtures: Optional[Fixtures] = None,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 seed: Optional[int] = None):
+        super().__init__(address, _ReplayHandler)
+        self.fixtures = fixtures or Fixtures()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = Counter()
+        self.bytes_sent = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def base_url(self, source: str) -> str:
+        """抓取器的base_url，IPTV365直接向base_url发POST，需保留结尾的斜杠"""
+        return f'{self.url}/{source}/' if source == 'iptv365' else f'{self.url}/{source}'
+
+    def start(self) -> 'ReplayServer':
+        """在后台线程中运行"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'ReplayServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent.clear()
+
+    def record(self, source: str, size: int) -> None:
+        with self._lock:
+            self.requests[source] += 1
+            self.bytes_sent[source] += size
+
+    def draw(self) -> Tuple[float, bool]:
+        """返回本次请求的 (延迟, 是否注入错误)"""
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter) if self.jitter else self.latency
+            return delay, self._random.random() < self.error_rate
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: ReplayServer
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle(b'')
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        self._handle(self.rfile.read(length))
+
+    def _handle(self, body: bytes) -> None:
+        parts = urlsplit(self.path)
+        segments = [segment for segment in parts.path.split('/') if segment]
+        source = segments[0] if segments else ''
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        delay, failed = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if failed and source in SOURCES:
+            self.server.record(source, 0)
+            if not self.server.error_status:
+                self.close_connection = True
+                self.connection.close()
+                return
+            self._send(self.server.error_status, b'', 'text/plain')
+            return
+
+        try:
+            result = self._route(source, segments[1:], query, body)
+        except (KeyError, ValueError, UnicodeDecodeError):
+            result = None
+        if result is None:
+            self._send(404, b'not found', 'text/plain')
+            return
+        content, content_type = result
+        self.server.record(source, len(content))
+        self._send(200, content, content_type)
+
+    def _route(self, source: str, path: list, query: dict, body: bytes) -> Optional[Tuple[bytes, str]]:
+        fixtures = self.server.fixtures
+        stream_base = self.server.url
+        html = 'text/html; charset=utf-8'
+        if source == 'tonkiang':
+            if path == ['ga.php']:
+                return _CITY.encode(), 'text/plain'
+            if self.command == 'POST':
+                keyword = parse_qs(body.decode('utf-8'))['seerch'][0]
+                return fixtures.tonkiang_page(keyword, 1, _L_PARAM, stream_base), html
+            page = int(query.get('page', 1))
+            return fixtures.tonkiang_page(query['iptv'], page, _L_PARAM, stream_base), html
+        if source == 'allinone' and path == ['search']:
+            page = int(query.get('page', 1))
+            return fixtures.allinone_page(query['q'], page, stream_base), html
+        if source == 'hacks' and path == ['api', 'search']:
+            keyword = base64.b64decode(query['query']).decode('utf-8')
+            return fixtures.hacks_page(keyword, stream_base), html
+        if source == 'iptv365' and self.command == 'POST':
+            keyword = json.loads(body.decode('utf-8'))['searchTerm']
+            return fixtures.iptv365_sources(keyword, stream_base), 'application/json'
+        if source == 'stream':
+            if path and path[-1].endswith('.ts'):
+                return _SEGMENT * 1000, 'video/mp2t'
+            return stream_playlist(), 'application/vnd.apple.mpegurl'
+        return None
+
+    def _send(self, status: int, content: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='各数据源的本地替身服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--per-page', type=int, default=30, help='每页频道数')
+    parser.add_argument('--pages', type=int, default=5, help='总页数')
+    parser.add_argument('--recordings', help='录制页面目录，按 <数据源>/page_N.html 存放')
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟的上限（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='注入错误的概率')
+    parser.add_argument('--error-status', type=int, default=503, help='注入的状态码，0表示断开连接')
+    args = parser.parse_args()
+
+    fixtures = Fixtures(per_page=args.per_page, pages=args.pages, recordings=args.recordings)
+    server = ReplayServer((args.host, args.port), fixtures, latency=args.latency, jitter=args.jitter,
+                          error_rate=args.error_rate, error_status=args.error_status)
+    print(f'回放服务器已启动: {server.url}')
+    for source in SOURCES:
+        print(f'  {source}: {server.base_url(source)}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
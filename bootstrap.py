@@ -0,0 +1,83 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import urllib3
+
+# 在此处添加新的抓取类
+from tonkiang_scraper import TonkiangScraper
+from allinone_scraper import AllinoneScraper
+from hacks_scraper import HacksScraper
+from iptv365_scraper import IPTV365Scraper
+from base_scraper import BaseIPTVScraper
+from multi_scraper import ALL_SOURCES, MultiSourceScraper
+from channel_store import ChannelStore
+from config import LOG_CONFIG, DNS_CACHE_CONFIG, SPEED_TEST_CONFIG
+from dns_cache import install_resolver
+from speed_tester import SpeedTester
+from transport import Transport, get_default_transport
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# 已注册的抓取器，GUI与命令行共用
+SCRAPER_CLASSES = {
+    "Tonkiang": TonkiangScraper,
+    "Allinone": AllinoneScraper,
+    "Hacks": HacksScraper,
+    "IPTV365": IPTV365Scraper,
+}
+
+
+def configure_logging(console: bool = True) -> None:
+    """配置日志输出"""
+    handlers = [logging.FileHandler(LOG_CONFIG['filename'], encoding='utf-8')]
+    if console:
+        handlers.append(logging.StreamHandler())
+    logging.basicConfig(
+        level=LOG_CONFIG['level'],
+        format=LOG_CONFIG['format'],
+        handlers=handlers
+    )
+    # 抑制urllib3和requests的警告日志
+    logging.getLogger('urllib3').setLevel(logging.ERROR)
+    logging.getLogger('requests').setLevel(logging.ERROR)
+
+
+def configure_requests() -> Transport:
+    """初始化所有抓取器共用的传输层，并启用DNS缓存"""
+    transport = get_default_transport()
+    if DNS_CACHE_CONFIG['enabled']:
+        install_resolver()
+    return transport
+
+
+def create_scrapers(include_all: bool = True, transport: Transport | None = None) -> Dict[str, BaseIPTVScraper]:
+    """创建所有已注册抓取器的实例并注入同一个传输层，include_all时额外提供并发搜索全部数据源的抓取器"""
+    transport = transport or get_default_transport()
+    scrapers = {name: scraper_class(transport) for name, scraper_class in SCRAPER_CLASSES.items()}
+    if include_all:
+        scrapers[ALL_SOURCES] = MultiSourceScraper(dict(scrapers), transport)
+    return scrapers
+
+
+def scrape_to_store(scraper: BaseIPTVScraper, keyword: str, page_count: int, random_mode: bool,
+                    speed_tester: Optional[SpeedTester] = None,
+                    max_workers: int = SPEED_TEST_CONFIG['max_workers']) -> Tuple[ChannelStore, Optional[Dict[str, Any]]]:
+    """抓取频道并写入ChannelStore，传入speed_tester时同时测速，返回 (存储, 测速统计)，GUI与命令行共用"""
+    store = ChannelStore()
+    if speed_tester is None:
+        store.extend(scraper.fetch_channels(keyword, page_count, random_mode))
+        return store, None
+
+    if SPEED_TEST_CONFIG['pipeline']:
+        # 边抓取边测速，每抓到一页立即开始探测
+        def batches():
+            for page_channels in scraper.iter_channels(keyword, page_count, random_mode):
+                store.extend(page_channels)
+                yield page_channels
+
+        accessible_channels, stats = speed_tester.test_stream(batches(), max_workers=max_workers)
+    else:
+        store.extend(scraper.fetch_channels(keyword, page_count, random_mode))
+        accessible_channels, stats = speed_tester.test_channels(list(store.all()), max_workers=max_workers)
+    store.mark_accessible(accessible_channels)
+    return store, stats
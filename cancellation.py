@@ -0,0 +1,123 @@
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ClosedPoolError
+
+_local = threading.local()
+
+
+class CancelScope:
+    """一组探测共享的取消范围：记录各工作线程正在使用的连接，取消时关闭这些连接，
+    使阻塞在recv中的请求立即返回，之后的新请求直接失败；设有截止时间时，连接超时不超过剩余时间"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.cancelled = False
+        # 截止时间（time.monotonic()），正在建立中的连接无法关闭，由probe_timeout按剩余时间限制超时
+        self.deadline = deadline
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def register(self, conn) -> bool:
+        """登记正在使用的连接，范围已取消时返回False"""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._connections.add(conn)
+            return True
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数，没有截止时间时返回None"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def unregister(self, conn) -> None:
+        with self._lock:
+            self._connections.discard(conn)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            sock = getattr(conn, 'sock', None)
+            if sock is None:
+                # 仍在连接中，由受截止时间限制的连接超时结束
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def current_scope() -> Optional[CancelScope]:
+    return getattr(_local, 'scope', None)
+
+
+@contextmanager
+def activate(scope: Optional[CancelScope]) -> Iterator[None]:
+    """在当前线程内启用取消范围，期间经CancellableHTTPAdapter发出的请求都受其控制"""
+    previous = current_scope()
+    _local.scope = scope
+    try:
+        yield
+    finally:
+        _local.scope = previous
+
+
+class _ScopedPoolMixin:
+    """从连接池取出连接时登记到当前线程的取消范围，归还时注销"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        scope = current_scope()
+        if scope is not None and not scope.register(conn):
+            # urlopen在异常时会向连接池放回一个空位，这里关闭连接而不归还，以免重复归还
+            conn.close()
+            raise ClosedPoolError(self, "测速已取消")
+        return conn
+
+    def _put_conn(self, conn):
+        scope = current_scope()
+        if scope is not None:
+            scope.unregister(conn)
+        super()._put_conn(conn)
+
+
+_scoped_pool_classes = {}
+
+
+def _scoped(pool_class):
+    """为连接池类生成支持取消范围的子类，SOCKS等代理连接池同样适用"""
+    if issubclass(pool_class, _ScopedPoolMixin):
+        return pool_class
+    scoped = _scoped_pool_classes.get(pool_class)
+    if scoped is None:
+        scoped = type(f'_Scoped{pool_class.__name__}', (_ScopedPoolMixin, pool_class), {})
+        _scoped_pool_classes[pool_class] = scoped
+    return scoped
+
+
+def _install(manager) -> None:
+    manager.pool_classes_by_scheme = {
+        scheme: _scoped(pool_class) for scheme, pool_class in manager.pool_classes_by_scheme.items()
+    }
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """支持CancelScope的HTTPAdapter，未启用取消范围时与HTTPAdapter行为相同"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        _install(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        # 使用代理时请求经由各代理对应的管理器发出
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        _install(manager)
+        return manager
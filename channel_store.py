@@ -0,0 +1,143 @@
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from base_scraper import IPTVChannel
+
+
+class ChannelView(Sequence):
+    """ChannelStore的只读视图，只保存频道在存储中的位置，过滤与排序不复制频道对象"""
+
+    def __init__(self, store: 'ChannelStore', positions: Sequence[int]):
+        self._store = store
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[IPTVChannel]:
+        channels = self._store._channels
+        return (channels[pos] for pos in self._positions)
+
+    def __getitem__(self, item):
+        channels = self._store._channels
+        if isinstance(item, slice):
+            return [channels[pos] for pos in self._positions[item]]
+        return channels[self._positions[item]]
+
+    def filter(self, **criteria) -> 'ChannelView':
+        """在当前视图内过滤，参数同ChannelStore.filter"""
+        matched = self._store._match(**criteria)
+        if matched is None:
+            return self
+        return ChannelView(self._store, [pos for pos in self._positions if pos in matched])
+
+    def sorted_by_response_time(self) -> 'ChannelView':
+        """按响应时间升序排列，未测速的频道排在最后"""
+        channels = self._store._channels
+
+        def key(pos: int):
+            response_time = channels[pos].response_time
+            return (response_time is None, response_time or 0)
+
+        return ChannelView(self._store, sorted(self._positions, key=key))
+
+    def to_dicts(self) -> List[dict]:
+        return [channel.to_dict() for channel in self]
+
+
+class ChannelStore:
+    """抓取结果存储：每个频道只保存一份，按频道名、分辨率和数据源建立索引"""
+
+    def __init__(self, channels: Iterable[IPTVChannel] = ()):
+        self._channels: List[IPTVChannel] = []
+        self._positions: Dict[int, int] = {}
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_resolution: Dict[str, List[int]] = {}
+        self._by_source: Dict[str, List[int]] = {}
+        self._accessible: set = set()
+        self._accessible_order: List[int] = []
+        # 未测速时所有频道都视为有效
+        self.speed_tested = False
+        self._lock = threading.Lock()
+        self.extend(channels)
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def add(self, channel: IPTVChannel) -> None:
+        with self._lock:
+            self._add(channel)
+
+    def extend(self, channels: Iterable[IPTVChannel]) -> None:
+        with self._lock:
+            for channel in channels:
+                self._add(channel)
+
+    def _add(self, channel: IPTVChannel) -> None:
+        if id(channel) in self._positions:
+            return
+        pos = len(self._channels)
+        self._channels.append(channel)
+        self._positions[id(channel)] = pos
+        self._by_name.setdefault(channel.channel_name or '', []).append(pos)
+        self._by_resolution.setdefault(channel.resolution or '', []).append(pos)
+        self._by_source.setdefault(channel.source or '', []).append(pos)
+
+    def mark_accessible(self, channels: Iterable[IPTVChannel]) -> None:
+        """记录测速结果并保留测速给出的排序，未加入存储的频道会先加入"""
+        with self._lock:
+            self.speed_tested = True
+            for channel in channels:
+                self._add(channel)
+                pos = self._positions[id(channel)]
+                if pos not in self._accessible:
+                    self._accessible.add(pos)
+                    self._accessible_order.append(pos)
+
+    def names(self) -> List[str]:
+        return list(self._by_name)
+
+    def resolutions(self) -> List[str]:
+        return list(self._by_resolution)
+
+    def all(self) -> ChannelView:
+        return ChannelView(self, range(len(self._channels)))
+
+    def accessible(self) -> ChannelView:
+        """测速可用的频道，按测速结果的顺序排列"""
+        return ChannelView(self, list(self._accessible_order))
+
+    def valid_channels(self) -> ChannelView:
+        """导出与展示使用的有效频道：测速后为可用频道，未测速时为全部频道"""
+        return self.accessible() if self.speed_tested else self.all()
+
+    def filter(self, **criteria) -> ChannelView:
+        """按 name / name_contains / resolution / source / accessible 过滤，返回保持原顺序的视图"""
+        matched = self._match(**criteria)
+        if matched is None:
+            return self.all()
+        return ChannelView(self, sorted(matched))
+
+    def _match(self, name: Optional[str] = None, name_contains: Optional[str] = None,
+               resolution: Optional[str] = None, source: Optional[str] = None,
+               accessible: Optional[bool] = None) -> Optional[set]:
+        """返回满足全部条件的位置集合，未指定任何条件时返回None"""
+        candidates = []
+        if name is not None:
+            candidates.append(set(self._by_name.get(name, ())))
+        if name_contains:
+            # 只扫描去重后的频道名，而非全部频道
+            needle = name_contains.lower()
+            candidates.append({pos for key, positions in self._by_name.items()
+                               if needle in key.lower() for pos in positions})
+        if resolution is not None:
+            candidates.append(set(self._by_resolution.get(resolution, ())))
+        if source is not None:
+            candidates.append(set(self._by_source.get(source, ())))
+        if accessible is not None:
+            candidates.append(self._accessible if accessible
+                              else set(range(len(self._channels))) - self._accessible)
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
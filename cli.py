@@ -0,0 +1,157 @@
+"""无界面批处理入口，适用于服务器与cron定时任务
+
+示例:
+    python cli.py 北京 上海 -s Tonkiang -s IPTV365 -p 3 --speed-test -o output
+    python cli.py -f keywords.txt --speed-test --speed-mode async
+    python cli.py 广东 --merge --speed-test
+"""
+import argparse
+import logging
+import os
+import re
+import sys
+from typing import List
+
+from bootstrap import SCRAPER_CLASSES, configure_logging, configure_requests, create_scrapers, scrape_to_store
+from config import VERSION, MAX_PAGE, SPEED_TEST_CONFIG
+from exporter import serialize_result, write_json, write_txt
+from metrics import get_metrics, serve_metrics
+from multi_scraper import ALL_SOURCES, MultiSourceScraper
+from speed_tester import SpeedTester
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f"频道工具命令行模式 v{VERSION}")
+    parser.add_argument('keywords', nargs='*', help="搜索关键词")
+    parser.add_argument('-f', '--keywords-file', help="关键词文件，每行一个，#开头为注释")
+    parser.add_argument('-s', '--source', action='append', choices=list(SCRAPER_CLASSES.keys()),
+                        help="数据源，可重复指定，默认使用全部已注册数据源")
+    parser.add_argument('--merge', action='store_true', help="并发搜索所有选定数据源，合并结果后统一测速")
+    parser.add_argument('-p', '--pages', type=int, default=1, help=f"抓取深度 (1-{MAX_PAGE})")
+    parser.add_argument('--no-random', action='store_true', help="关闭随机模式，按顺序抓取页面")
+    parser.add_argument('--speed-test', action='store_true', help="启用测速，仅输出可用频道")
+    parser.add_argument('--speed-mode', choices=SpeedTester.MODES, default=SPEED_TEST_CONFIG['mode'],
+                        help="测速模式")
+    parser.add_argument('--deep-probe', action='store_true', default=SPEED_TEST_CONFIG['deep_probe'],
+                        help="深度测速：下载HLS分片测量吞吐量，按能否流畅播放排序")
+    parser.add_argument('--time-budget', type=float, default=SPEED_TEST_CONFIG['time_budget'],
+                        help="测速总时间预算(秒)，到时中断未完成的探测并输出已有结果")
+    parser.add_argument('--limit', type=int, help="找到指定数量的可用地址后停止测速")
+    parser.add_argument('--no-cache', action='store_true', help="忽略测速缓存，重新探测所有地址")
+    parser.add_argument('--workers', type=int, default=SPEED_TEST_CONFIG['max_workers'], help="线程模式并发数")
+    parser.add_argument('-o', '--output-dir', default='output', help="结果输出目录")
+    parser.add_argument('--format', action='append', choices=['txt', 'json'], help="输出格式，默认txt与json")
+    parser.add_argument('--name-contains', help="只输出频道名包含该文字的频道（不区分大小写）")
+    parser.add_argument('--resolution', help="只输出该分辨率的频道，例如 1920x1080")
+    parser.add_argument('--proxy', help="代理地址，例如 127.0.0.1:8080")
+    parser.add_argument('--proxy-type', choices=['http', 'socks5'], default='http', help="代理类型")
+    parser.add_argument('--metrics-json', help="运行结束时将指标快照写入JSON文件")
+    parser.add_argument('--metrics-prom', help="运行结束时将指标以Prometheus文本格式写入文件（供textfile采集）")
+    parser.add_argument('--metrics-port', type=int, help="运行期间在该端口提供 /metrics 与 /metrics.json")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不在控制台输出日志")
+    return parser.parse_args(argv)
+
+
+def load_keywords(args: argparse.Namespace) -> List[str]:
+    keywords = list(args.keywords)
+    if args.keywords_file:
+        with open(args.keywords_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    keywords.append(line)
+    return keywords
+
+
+def safe_filename(text: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', text).strip('_') or 'result'
+
+
+def run(args: argparse.Namespace) -> int:
+    keywords = load_keywords(args)
+    if not keywords:
+        logging.error("未指定搜索关键词")
+        return 2
+
+    page_count = max(1, min(args.pages, MAX_PAGE))
+    formats = args.format or ['txt', 'json']
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    scrapers = create_scrapers(include_all=False)
+    sources = args.source or list(scrapers.keys())
+    if args.merge:
+        scrapers = {ALL_SOURCES: MultiSourceScraper({name: scrapers[name] for name in sources})}
+        sources = [ALL_SOURCES]
+    for name in sources:
+        if args.proxy:
+            scrapers[name].set_proxy(args.proxy, args.proxy_type)
+
+    found_any = False
+    for keyword in keywords:
+        for name in sources:
+            scraper = scrapers[name]
+            logging.info(f"[{name}] 开始抓取: {keyword}")
+            speed_tester = None
+            if args.speed_test:
+                speed_tester = SpeedTester(scraper=scraper, mode=args.speed_mode, use_cache=not args.no_cache,
+                                           deep_probe=args.deep_probe, time_budget=args.time_budget,
+                                           limit=args.limit)
+            try:
+                store, stats = scrape_to_store(scraper, keyword, page_count, not args.no_random, speed_tester,
+                                               args.workers)
+            except Exception as e:
+                logging.error(f"[{name}] 抓取失败: {str(e)}")
+                continue
+
+            if not len(store):
+                logging.warning(f"[{name}] 未提取到频道信息: {keyword}")
+                continue
+
+            result = {"city": keyword, "source": name, "store": store}
+            if stats is not None:
+                result["stats"] = stats
+
+            valid_channels = store.valid_channels().filter(name_contains=args.name_contains,
+                                                           resolution=args.resolution)
+            found_any = found_any or bool(valid_channels)
+            basename = os.path.join(args.output_dir, f"{safe_filename(keyword)}_{name}")
+            if 'txt' in formats:
+                write_txt(f"{basename}_valid_channels.txt", valid_channels)
+            if 'json' in formats:
+                write_json(f"{basename}_result.json", serialize_result(result, valid_channels))
+            logging.info(f"[{name}] {keyword}: 共 {len(store)} 个频道，输出 {len(valid_channels)} 个 -> {basename}_*")
+
+    return 0 if found_any else 1
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    configure_requests()
+    configure_logging(console=not args.quiet)
+    logging.info(f"启动频道工具命令行模式 v{VERSION}")
+    metrics_server = serve_metrics(args.metrics_port) if args.metrics_port else None
+    try:
+        return run(args)
+    finally:
+        export_metrics(args)
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+def export_metrics(args: argparse.Namespace) -> None:
+    """运行结束时导出指标"""
+    metrics = get_metrics()
+    try:
+        if args.metrics_json:
+            metrics.write_snapshot(args.metrics_json)
+            logging.info(f"指标快照已写入: {args.metrics_json}")
+        if args.metrics_prom:
+            with open(args.metrics_prom, 'w', encoding='utf-8') as f:
+                f.write(metrics.to_prometheus())
+            logging.info(f"Prometheus指标已写入: {args.metrics_prom}")
+    except OSError as e:
+        logging.error(f"指标导出失败: {str(e)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,120 @@
 VERSION = "1.5.0"
 MAX_PAGE = 5
 
+# 测速配置
+SPEED_TEST_CONFIG = {
+    'mode': 'thread',           # thread: 线程池测速; async: asyncio事件循环测速
+    'max_workers': 48,          # 线程模式的并发数（总并发，单个主机另受per_host_limit限制）
+    'async_concurrency': 500,   # 异步模式同时在途的探测数
+    'dedup': True,              # 相同播放地址只探测一次
+    'pipeline': True,           # 边抓取边测速
+    'deep_probe': False,        # 深度测速：下载HLS分片测量吞吐量，按能否流畅播放排序
+    'time_budget': None,        # 测速总时间预算(秒)，到时中断在途请求并返回已有结果；None为不限
+}
+
+# HTTP传输层配置，所有抓取与测速请求共用
+TRANSPORT_CONFIG = {
+    'retries': 1,               # 失败重试次数
+    'backoff_factor': 0.5,
+    'status_forcelist': [429, 500, 502, 503, 504],
+}
+
+# 测速连接池配置：按主机复用长连接并限制并发，避免集中压垮单个源站
+PROBE_POOL_CONFIG = {
+    'per_host_limit': 4,        # 同一主机同时进行的探测数
+    'pool_hosts': 256,          # 连接池缓存的主机数，超出后关闭最久未用主机的连接
+    'pool_maxsize': 20,         # 每个主机保留的长连接数
+}
+
+# DNS预解析与缓存配置
+DNS_CACHE_CONFIG = {
+    'enabled': True,
+    'ttl': 300,                 # 解析成功的缓存时间(秒)
+    'negative_ttl': 60,         # 解析失败的缓存时间(秒)
+    'workers': 32,              # 并发解析数
+    'timeout': 2.0,             # 每批预解析的最长等待时间(秒)，未完成的在后台继续
+}
+
+# 自适应超时配置：按主机的连接与首字节耗时(EWMA)计算探测超时
+ADAPTIVE_TIMEOUT_CONFIG = {
+    'enabled': True,
+    'default': (3.05, 4.5),     # 没有历史数据时的 (连接超时, 读取超时)
+    'alpha': 0.3,               # EWMA平滑系数，越大越偏重最近的样本
+    'deviation_factor': 4,      # 超时 = 平均耗时 + deviation_factor * 平均偏差
+    'connect_range': (1.0, 6.0),    # 连接超时的下限与上限
+    'read_range': (1.5, 10.0),      # 读取超时的下限与上限
+    'failure_threshold': 2,     # 从未成功且连续超时达到该次数的主机直接使用下限
+}
+
+# 探测优先级配置：按预测的成功概率决定探测顺序
+PRIORITY_CONFIG = {
+    'enabled': True,
+    'filename': 'host_stats.json',  # 各主机历史探测成功率
+    'max_attempts': 100,            # 单个主机的统计次数上限，超过后减半以偏重近期结果
+    'date_half_life': 7,            # 数据源日期每过多少天可用概率估计减半
+    'weights': {'host': 0.6, 'date': 0.3, 'resolution': 0.1},
+}
+
+# 深度测速配置
+HLS_PROBE_CONFIG = {
+    'max_segments': 2,                  # 下载的媒体分片数
+    'segment_bytes': 2 * 1024 * 1024,   # 单个分片最多下载的字节数
+    'timeout': (3.05, 10),              # (连接超时, 读取超时)
+    'default_bitrate': 2_000_000,       # 播放列表未声明BANDWIDTH时用于比较的码率(bps)
+}
+
+# Hacks频道探测配置
+HACKS_PROBE_CONFIG = {
+    'max_bytes': 64 * 1024,             # 单次探测最多读取（解压后）的字节数
+    'chunk_size': 8 * 1024,             # 每次从套接字读取的字节数
+}
+
+# 运行指标配置（请求数、字节数、各阶段耗时、测速结果分类）
+METRICS_CONFIG = {
+    'enabled': True,
+    'latency_buckets': (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),                 # 耗时直方图的桶上界(秒)
+    'size_buckets': (512, 4096, 16384, 65536, 262144, 1048576, 4194304),       # 响应大小直方图的桶上界(字节)
+}
+
+# 测速结果缓存配置
+PROBE_CACHE_CONFIG = {
+    'enabled': True,
+    'filename': 'probe_cache.json',
+    'alive_ttl': 1800,          # 可用结果的有效期(秒)
+    'dead_ttl': 300,            # 不可用结果的有效期(秒)，较短以便重新检测
+}
+
+# 搜索结果缓存配置，按 (数据源, 关键词, 页码) 缓存
+SEARCH_CACHE_CONFIG = {
+    'enabled': True,
+    'ttl': 1800,                # 有效期(秒)
+    'max_entries': 256,         # 最多缓存的页面数，超出后淘汰最久未使用的
+    'max_page_channels': 5000,  # 单页超过该频道数时不缓存，流式解析的结果不必全部留在内存中
+    'persist': False,           # 是否在重启后保留
+    'filename': 'search_cache.json',
+}
+
+# 界面刷新配置
+GUI_CONFIG = {
+    'refresh_interval': 100,    # 进度与结果表格的刷新间隔(毫秒)
+    'row_batch': 500,           # 每次刷新最多插入的行数
+    'log_batch': 1000,          # 每次轮询最多处理的日志条数
+    'log_max_lines': 2000,      # 日志窗口保留的最大行数，超出时删除最早的行
+}
+
+# HTML解析后端: auto(优先使用lxml) / lxml / html.parser
+HTML_PARSER_BACKEND = 'auto'
+
+# 分页并发抓取配置
+PAGE_FETCH_WORKERS = 4
+
+# 各数据源的令牌桶限速配置，rate为每秒请求数，burst为允许的突发请求数
+RATE_LIMIT_CONFIG = {
+    'default': {'rate': 2.0, 'burst': 4},
+    'TonkiangScraper': {'rate': 2.0, 'burst': 4},
+    'AllinoneScraper': {'rate': 1.5, 'burst': 4},
+}
+
 # 日志配置
 LOG_CONFIG = {
     'level': 'INFO',
@@ -0,0 +1,115 @@
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import DNS_CACHE_CONFIG
+
+_system_getaddrinfo = socket.getaddrinfo
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+class DNSCache:
+    """带TTL的主机名解析缓存，解析失败的主机也会在negative_ttl内缓存，后续请求直接失败"""
+
+    def __init__(self, ttl: float = DNS_CACHE_CONFIG['ttl'],
+                 negative_ttl: float = DNS_CACHE_CONFIG['negative_ttl'],
+                 workers: int = DNS_CACHE_CONFIG['workers']):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.workers = workers
+        # 主机名 -> (地址列表，解析失败时为None, 过期时间)
+        self._entries: Dict[str, Tuple[Optional[List[str]], float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Tuple[bool, Optional[List[str]]]:
+        """返回 (是否命中, 地址列表)，命中且地址为None表示该主机无法解析"""
+        host = host.lower()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None or entry[1] < time.time():
+                return False, None
+            return True, entry[0]
+
+    def resolve(self, host: str) -> Optional[List[str]]:
+        """解析主机名并写入缓存，失败返回None"""
+        host = host.lower()
+        try:
+            infos = _system_getaddrinfo(host, None, type=socket.SOCK_STREAM)
+            addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        except (socket.gaierror, UnicodeError):
+            addresses = None
+        ttl = self.ttl if addresses else self.negative_ttl
+        with self._lock:
+            self._entries[host] = (addresses or None, time.time() + ttl)
+        return addresses or None
+
+    def prefetch(self, hosts: Iterable[str], timeout: float = DNS_CACHE_CONFIG['timeout']) -> List[str]:
+        """并发解析尚未缓存的主机名，返回确认无法解析的主机；超时未完成的解析在后台继续并写入缓存"""
+        pending = set()
+        unresolved = []
+        for host in {host.lower() for host in hosts if host and not _is_ip(host)}:
+            hit, addresses = self.get(host)
+            if not hit:
+                pending.add(host)
+            elif addresses is None:
+                unresolved.append(host)
+        if not pending:
+            return unresolved
+
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(pending)))
+        futures = {executor.submit(self.resolve, host): host for host in pending}
+        done, not_done = wait(futures, timeout=timeout)
+        executor.shutdown(wait=False)
+        unresolved.extend(futures[future] for future in done if future.result() is None)
+        logging.debug(f"预解析 {len(pending)} 个主机，失败 {len(unresolved)} 个，超时 {len(not_done)} 个")
+        return unresolved
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """socket.getaddrinfo的缓存版本，未缓存的主机交由系统解析"""
+        if isinstance(host, str) and host and not _is_ip(host):
+            hit, addresses = self.get(host)
+            if hit and addresses is None:
+                raise socket.gaierror(socket.EAI_NONAME, f"无法解析主机 {host} (缓存)")
+            if hit:
+                results = []
+                for address in addresses:
+                    try:
+                        results.extend(_system_getaddrinfo(address, port, family, type, proto, flags))
+                    except socket.gaierror:
+                        continue
+                if results:
+                    return results
+        return _system_getaddrinfo(host, port, family, type, proto, flags)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache: DNSCache | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_resolver() -> DNSCache:
+    """进程内共享的解析缓存"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = DNSCache()
+        return _default_cache
+
+
+def install_resolver() -> None:
+    """让socket.getaddrinfo优先使用解析缓存，requests与asyncio的连接都会经过这里"""
+    socket.getaddrinfo = get_default_resolver().getaddrinfo
@@ -0,0 +1,33 @@
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from base_scraper import IPTVChannel
+
+
+def serialize_result(result: Dict[str, Any], valid_channels: Optional[Iterable[IPTVChannel]] = None) -> Dict[str, Any]:
+    """创建可序列化的结果副本，频道列表在导出时才由ChannelStore生成；
+    valid_channels为筛选后的有效频道，默认为存储中的全部有效频道"""
+    serializable_result = {key: value for key, value in result.items() if key != 'store'}
+    store = result.get('store')
+    if store is not None:
+        serializable_result['channels'] = store.all().to_dicts()
+        if store.speed_tested:
+            serializable_result['accessible_channels'] = store.accessible().to_dicts()
+        if valid_channels is None:
+            valid_channels = store.valid_channels()
+        serializable_result['accessible_urls'] = [channel.to_dict() for channel in valid_channels]
+    return serializable_result
+
+
+def write_txt(filepath: str, channels: Iterable[IPTVChannel]) -> None:
+    """按 频道名,URL 的格式写入TXT文件"""
+    with open(filepath, 'w', encoding='utf-8') as f:
+        for channel in channels:
+            name = (channel.channel_name or '未知频道').strip()
+            url = (channel.url or '').strip()
+            f.write(f"{name},{url}\n")
+
+
+def write_json(filepath: str, data: Dict[str, Any]) -> None:
+    with open(filepath, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
@@ -1,4 +1,3 @@
-import json
 import logging
 import queue
 import re
@@ -7,8 +6,12 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import requests
 import traceback
+from collections import deque
 
-from config import LOG_CONFIG
+from bootstrap import scrape_to_store
+from config import LOG_CONFIG, SPEED_TEST_CONFIG, PROBE_CACHE_CONFIG, GUI_CONFIG
+from multi_scraper import ALL_SOURCES
+from exporter import serialize_result, write_json, write_txt
 from speed_tester import SpeedTester
 
 logging.basicConfig(
@@ -20,6 +23,9 @@ logging.basicConfig(
     ]
 )
 
+# 分辨率筛选中表示不限分辨率的选项
+ALL_RESOLUTIONS = "全部"
+
 class IPTVScraperGUI:
     def __init__(self, root, version="1.3.0", max_page=5):
         self.root = root
@@ -29,6 +35,10 @@ class IPTVScraperGUI:
         self.session = requests.Session()
         self.log_queue = queue.Queue()
         self.result_queue = queue.Queue()
+        self.row_queue = queue.Queue()
+        self._progress_state = None
+        self._shown_progress = None
+        self._render_id = 0
         self.running = False
         self.last_result = None
         self.proxy_enabled = False
@@ -63,6 +73,7 @@ class IPTVScraperGUI:
         self.create_proxy_controls()
         self.progress_label = None
         self.create_progress_label()
+        self.refresh_view()
 
         self.root.bind('<<ScrapingDone>>', self.on_scraping_done)
         
@@ -152,7 +163,7 @@ class IPTVScraperGUI:
         webbrowser.open(url)
 
     def export_valid_txt(self):
-        if not self.last_result or 'accessible_urls' not in self.last_result:
+        if not self.last_result:
             messagebox.showwarning("警告", "没有可导出的有效节目数据")
             return
 
@@ -164,11 +175,7 @@ class IPTVScraperGUI:
         )
         if filepath:
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    for item in self.last_result['accessible_urls']:
-                        channel = item.get('channel_name', '未知频道').strip()
-                        url = item.get('url', '').strip()
-                        f.write(f"{channel},{url}\n")
+                write_txt(filepath, self.last_result['store'].valid_channels())
                 messagebox.showinfo("保存成功", f"文件已保存至：{filepath}")
             except Exception as e:
                 messagebox.showerror("保存失败", f"文件写入错误: {str(e)}")
@@ -181,6 +188,29 @@ class IPTVScraperGUI:
                 foreground="#666" if status == "就绪" else "#2ecc71"
             )
 
+    def _post_progress(self, status, current, total):
+        """ 记录最新进度，由refresh_view按固定频率刷新（可在工作线程调用） """
+        self._progress_state = (status, current, total)
+
+    def refresh_view(self):
+        """按固定频率刷新进度标签，并分批插入测速中新确认可用的频道"""
+        state = self._progress_state
+        if state is not self._shown_progress:
+            self._shown_progress = state
+            self._update_progress(*state)
+
+        inserted = 0
+        while inserted < GUI_CONFIG['row_batch']:
+            try:
+                channels = self.row_queue.get_nowait()
+            except queue.Empty:
+                break
+            for channel in channels:
+                self.tree.insert('', tk.END, values=self._row_values(channel))
+            inserted += len(channels)
+
+        self.root.after(GUI_CONFIG['refresh_interval'], self.refresh_view)
+
     def create_progress_label(self):
         log_frame = self.main_tab.grid_slaves(row=2, column=0)[0]
         self.progress_label = ttk.Label(log_frame, text="就绪")
@@ -282,9 +312,44 @@ class IPTVScraperGUI:
         self.start_btn = ttk.Button(input_frame, text="开始抓取", command=self.start_scraping)
         self.start_btn.grid(row=0, column=6, padx=5, sticky="ew")
 
+        self.option_frame = ttk.Frame(input_frame)
+        self.option_frame.grid(row=2, column=0, columnspan=8, sticky="ew")
+
+        self.async_var = tk.BooleanVar(value=SPEED_TEST_CONFIG['mode'] == 'async')
+        self.async_check = ttk.Checkbutton(self.option_frame, text="异步测速", variable=self.async_var)
+        self.async_check.pack(side=tk.LEFT, padx=5)
+
+        self.cache_var = tk.BooleanVar(value=PROBE_CACHE_CONFIG['enabled'])
+        self.cache_check = ttk.Checkbutton(self.option_frame, text="使用测速缓存", variable=self.cache_var)
+        self.cache_check.pack(side=tk.LEFT, padx=5)
+
+        self.deep_var = tk.BooleanVar(value=SPEED_TEST_CONFIG['deep_probe'])
+        self.deep_check = ttk.Checkbutton(self.option_frame, text="深度测速(吞吐量)", variable=self.deep_var)
+        self.deep_check.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(self.option_frame, text="时间预算(秒):").pack(side=tk.LEFT, padx=(15, 2))
+        budget = SPEED_TEST_CONFIG['time_budget']
+        self.budget_var = tk.StringVar(value=str(budget) if budget else '')
+        self.budget_entry = ttk.Entry(self.option_frame, textvariable=self.budget_var, width=6)
+        self.budget_entry.pack(side=tk.LEFT)
+
         result_frame = ttk.LabelFrame(self.main_tab, padding="10", text="频道列表")
         result_frame.grid(row=1, column=0, sticky="nsew")
 
+        # 在结果存储的视图上筛选，不复制频道
+        filter_frame = ttk.Frame(result_frame)
+        filter_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="筛选频道:").pack(side=tk.LEFT)
+        self.name_filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.name_filter_var, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Label(filter_frame, text="分辨率:").pack(side=tk.LEFT, padx=(10, 0))
+        self.resolution_var = tk.StringVar(value=ALL_RESOLUTIONS)
+        self.resolution_combo = ttk.Combobox(filter_frame, textvariable=self.resolution_var,
+                                             values=[ALL_RESOLUTIONS], state="readonly", width=12)
+        self.resolution_combo.pack(side=tk.LEFT, padx=5)
+        self.name_filter_var.trace_add("write", lambda *args: self.apply_filter())
+        self.resolution_var.trace_add("write", lambda *args: self.apply_filter())
+
         self.tree = ttk.Treeview(result_frame, columns=('channel', 'url', 'response'), show='headings')
         self.tree.heading('channel', text='频道名称')
         self.tree.heading('url', text='URL')
@@ -350,7 +415,7 @@ class IPTVScraperGUI:
     
 
     def export_valid_results(self):
-        if not self.last_result or 'accessible_urls' not in self.last_result:
+        if not self.last_result:
             messagebox.showwarning("警告", "没有可导出的有效节目数据")
             return
 
@@ -364,10 +429,9 @@ class IPTVScraperGUI:
             try:
                 valid_data = {
                     "city": self.last_result['city'],
-                    "accessible_urls": self.last_result['accessible_urls']
+                    "accessible_urls": self.last_result['store'].valid_channels().to_dicts()
                 }
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(valid_data, f, ensure_ascii=False, indent=4)
+                write_json(filepath, valid_data)
                 messagebox.showinfo("保存成功", f"文件已保存至：{filepath}")
             except Exception as e:
                 messagebox.showerror("保存失败", f"文件写入错误: {str(e)}")
@@ -390,17 +454,25 @@ class IPTVScraperGUI:
         self.poll_log_queue()
     
     def poll_log_queue(self):
-        """轮询日志队列并更新GUI"""
-        while not self.log_queue.empty():
+        """轮询日志队列，每次批量写入一次并裁剪到固定行数"""
+        max_lines = GUI_CONFIG['log_max_lines']
+        # 只保留本批次最新的日志，超出窗口容量的部分无需写入
+        lines = deque(maxlen=max_lines)
+        for _ in range(GUI_CONFIG['log_batch']):
             try:
-                msg = self.log_queue.get_nowait()
-                self.log_area.configure(state='normal')
-                self.log_area.insert(tk.END, msg + '\n')
-                self.log_area.configure(state='disabled')
-                self.log_area.see(tk.END)
+                lines.append(self.log_queue.get_nowait())
             except queue.Empty:
                 break
-        self.root.after(100, self.poll_log_queue)
+
+        if lines:
+            self.log_area.configure(state='normal')
+            self.log_area.insert(tk.END, '\n'.join(lines) + '\n')
+            line_count = int(self.log_area.index('end-1c').split('.')[0]) - 1
+            if line_count > max_lines:
+                self.log_area.delete('1.0', f'{line_count - max_lines + 1}.0')
+            self.log_area.configure(state='disabled')
+            self.log_area.see(tk.END)
+        self.root.after(GUI_CONFIG['refresh_interval'], self.poll_log_queue)
 
     def save_results(self):
         if not self.last_result:
@@ -416,22 +488,7 @@ class IPTVScraperGUI:
         if filepath:
             try:
                 # 创建可序列化的结果副本
-                serializable_result = self.last_result.copy()
-                
-                # 转换channels列表中的IPTVChannel对象为字典
-                if 'channels' in serializable_result:
-                    serializable_result['channels'] = [
-                        self.channel_to_dict(channel) for channel in serializable_result['channels']
-                    ]
-                
-                # 转换accessible_channels列表中的IPTVChannel对象为字典(如果存在)
-                if 'accessible_channels' in serializable_result:
-                    serializable_result['accessible_channels'] = [
-                        self.channel_to_dict(channel) for channel in serializable_result['accessible_channels']
-                    ]
-                
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(serializable_result, f, ensure_ascii=False, indent=4)
+                write_json(filepath, serialize_result(self.last_result))
                 messagebox.showinfo("保存成功", f"文件已保存至：{filepath}")
             except Exception as e:
                 messagebox.showerror("保存失败", f"文件写入错误: {str(e)}")
@@ -467,7 +524,7 @@ class IPTVScraperGUI:
             self.page_spin.config(state="normal")
             self.random_mode_check.config(state="normal")
             self.random_mode_var.set(True)
-        elif selected == "Allinone":
+        elif selected in ("Allinone", ALL_SOURCES):
             self.page_spin.config(state="normal")
             self.random_mode_check.config(state="normal")
             self.random_mode_var.set(True)
@@ -509,51 +566,57 @@ class IPTVScraperGUI:
             return
 
         enable_speed_test = self.speed_var.get()
+        speed_mode = 'async' if self.async_var.get() else 'thread'
+        use_cache = self.cache_var.get()
+        deep_probe = self.deep_var.get()
+        try:
+            time_budget = float(self.budget_var.get()) if self.budget_var.get().strip() else None
+        except ValueError:
+            messagebox.showerror("错误", "时间预算必须为数字")
+            return
         random_mode = self.random_mode_var.get()
         self.running = True
         self.start_btn.config(state=tk.DISABLED)
         self.save_btn.config(state=tk.DISABLED)
         self.tree.delete(*self.tree.get_children())
+        self.row_queue = queue.Queue()
+        self._render_id += 1
 
         threading.Thread(
             target=self.run_scraping,
-            args=(keyword, page_count, random_mode, enable_speed_test),
+            args=(keyword, page_count, random_mode, enable_speed_test, speed_mode, use_cache, deep_probe, time_budget),
             daemon=True
         ).start()
 
-    def run_scraping(self, keyword, page_count, random_mode, enable_speed_test):
+    def run_scraping(self, keyword, page_count, random_mode, enable_speed_test, speed_mode='thread', use_cache=True,
+                     deep_probe=False, time_budget=None):
         try:
-            channels = self.scraper.fetch_channels(keyword, page_count, random_mode)
-            if not channels:
-                self.result_queue.put({"error": "未提取到频道信息"})
-                return
-
+            speed_tester = None
             if enable_speed_test:
                 # 使用SpeedTester进行测速
                 speed_tester = SpeedTester(
                     scraper=self.scraper,
-                    progress_callback=lambda status, current, total: self.root.after(0, self._update_progress, status, current, total)
+                    progress_callback=self._post_progress,
+                    mode=speed_mode,
+                    use_cache=use_cache,
+                    deep_probe=deep_probe,
+                    time_budget=time_budget,
+                    result_callback=self.row_queue.put
                 )
-                accessible_channels, stats = speed_tester.test_channels(channels)
+            store, stats = scrape_to_store(self.scraper, keyword, page_count, random_mode, speed_tester)
 
-                accessible_urls = [self.channel_to_dict(channel) for channel in accessible_channels]
-                
-                result = {
-                    "city": keyword,
-                    "channels": channels,
-                    "accessible_channels": accessible_channels,
-                    "accessible_urls": accessible_urls,
-                    "stats": stats
-                }
+            if not len(store):
+                result = {"error": "未提取到频道信息"}
             else:
-                logging.info(f"未启用测速，共获取 {len(channels)} 个频道")
-                # 添加转换为字典的步骤，以便未测速时也能导出
-                channels_dict = [self.channel_to_dict(channel) for channel in channels]
                 result = {
                     "city": keyword,
-                    "channels": channels,
-                    "accessible_urls": channels_dict  # 未测速时，所有频道都视为可访问
+                    "store": store
                 }
+                if stats is not None:
+                    result["stats"] = stats
+                else:
+                    # 未测速时，所有频道都视为可访问
+                    logging.info(f"未启用测速，共获取 {len(store)} 个频道")
 
             self.result_queue.put(result)
             self.root.event_generate('<<ScrapingDone>>')
@@ -564,17 +627,6 @@ class IPTVScraperGUI:
         finally:
             self.running = False
 
-    def channel_to_dict(self, channel):
-        """将IPTVChannel对象转换为字典"""
-        return {
-            'channel_name': channel.channel_name,
-            'url': channel.url,
-            'date': channel.date,
-            'location': channel.location,
-            'resolution': channel.resolution,
-            'response_time': channel.response_time
-        }
-
     def check_channel(self, channel):
         """检查频道可用性"""
         is_accessible = self.scraper.check_channel_availability(channel)
@@ -594,7 +646,7 @@ class IPTVScraperGUI:
             self.show_results(result)
             
             # 启用导出按钮 - 根据不同情况启用不同按钮
-            if 'stats' in result and 'accessible_urls' in result:
+            if 'stats' in result:
                 # 启用测速的情况下，所有导出按钮都可用
                 self.export_valid_btn.config(state=tk.NORMAL)
                 self.export_txt_btn.config(state=tk.NORMAL)
@@ -612,7 +664,7 @@ class IPTVScraperGUI:
                     f"共抓取 {stats['total']} 个频道，其中 {stats['accessible']} 个可用")
             else:
                 # 未测速时显示总数
-                total = len(result.get('channels', []))
+                total = len(result['store'])
                 messagebox.showinfo("抓取完成", f"共抓取 {total} 个频道")
                 
         except queue.Empty:
@@ -621,20 +673,44 @@ class IPTVScraperGUI:
             self.start_btn.config(state=tk.NORMAL)
 
     def show_results(self, result):
-        """显示结果到表格中"""
+        """显示结果到表格中，分批插入以免大量结果阻塞界面"""
+        resolutions = [ALL_RESOLUTIONS] + sorted(resolution for resolution in result['store'].resolutions()
+                                                 if resolution)
+        self.resolution_combo.config(values=resolutions)
+        if self.resolution_var.get() not in resolutions:
+            self.resolution_var.set(ALL_RESOLUTIONS)
+        # 测速中流式插入的行由排序后的完整结果替换
+        self.row_queue = queue.Queue()
+        self._render_filtered(result['store'])
+
+    def apply_filter(self):
+        """筛选条件变化时按条件重新显示结果，任务运行中不影响流式插入的行"""
+        if self.last_result and not self.running:
+            self._render_filtered(self.last_result['store'])
+
+    def _render_filtered(self, store):
         self.tree.delete(*self.tree.get_children())
-        
+        self._render_id += 1
+        resolution = self.resolution_var.get()
         # 优先显示测速后的可访问频道，如果没有测速则显示所有频道
-        if 'accessible_channels' in result:
-            channels_to_show = result.get('accessible_channels', [])
-        else:
-            channels_to_show = result.get('channels', [])
-        
-        for channel in channels_to_show:
-            values = (
-                getattr(channel, 'channel_name', ''),
-                getattr(channel, 'url', ''),
-                f"{getattr(channel, 'response_time', 0):.3f}s" if hasattr(channel, 'response_time') and channel.response_time else ''
-            )
-            
-            self.tree.insert('', tk.END, values=values)
+        channels = store.valid_channels().filter(
+            name_contains=self.name_filter_var.get().strip(),
+            resolution=None if resolution == ALL_RESOLUTIONS else resolution
+        )
+        self._render_rows(channels, 0, self._render_id)
+
+    def _render_rows(self, channels, start, render_id):
+        if render_id != self._render_id:
+            return
+        end = start + GUI_CONFIG['row_batch']
+        for channel in channels[start:end]:
+            self.tree.insert('', tk.END, values=self._row_values(channel))
+        if end < len(channels):
+            self.root.after(1, self._render_rows, channels, end, render_id)
+
+    @staticmethod
+    def _row_values(channel):
+        response = f"{channel.response_time:.3f}s" if channel.response_time else ''
+        if channel.throughput:
+            response += f" / {channel.throughput / 1e6:.1f}Mbps"
+        return channel.channel_name, channel.url, response
@@ -1,61 +1,184 @@
 import base64
 import logging
 import requests
-from bs4 import BeautifulSoup
-from typing import List
+import urllib3
+from urllib3.exceptions import ReadTimeoutError
+from bs4 import SoupStrainer
+from typing import Iterator, List
 from base_scraper import BaseIPTVScraper, IPTVChannel
-from config import HACKS_HEADERS
+from transport import Transport
+from host_timeouts import observe_probe, probe_timeout
+from metrics import mark_failure
+from config import HACKS_HEADERS, HACKS_PROBE_CONFIG
+from parsing import make_soup
 from urllib.parse import quote
 import brotli
 import time
+import zlib
 
-def generate_search_url(query: str) -> str:
+def generate_search_url(query: str, base_url: str = "https://iptvs.hacks.tools") -> str:
     base64_str = base64.b64encode(query.encode('utf-8')).decode('utf-8')
     url_encoded = quote(base64_str)
-    return f"https://iptvs.hacks.tools/api/search?query={url_encoded}"
+    return f"{base_url}/api/search?query={url_encoded}"
+
+
+_BOM = b'\xef\xbb\xbf'
+# brotli 1.2起process()支持output_buffer_limit
+try:
+    brotli.Decompressor().process(b'', output_buffer_limit=1)
+    _BROTLI_OUTPUT_LIMIT = True
+except TypeError:
+    _BROTLI_OUTPUT_LIMIT = False
+_ACCEPT_ENCODING = 'gzip, deflate, br' if _BROTLI_OUTPUT_LIMIT else 'gzip, deflate'
+_TS_PACKET_SIZE = 188
+
+
+class _BoundedBody:
+    """将响应体增量解压到预分配的定长缓冲区中，写满max_bytes后不再读取"""
+
+    def __init__(self, encoding: str | None, max_bytes: int) -> None:
+        self.buffer = bytearray(max_bytes)
+        self.size = 0
+        encoding = (encoding or '').strip().lower()
+        if encoding == 'br':
+            self._decoder = brotli.Decompressor()
+        elif encoding in ('gzip', 'deflate'):
+            # 自动识别gzip与zlib头
+            self._decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        else:
+            self._decoder = None
+        self._raw_deflate = encoding == 'deflate'
+
+    def _decode(self, data: bytes) -> bytes:
+        if self._decoder is None:
+            return data
+        if isinstance(self._decoder, brotli.Decompressor):
+            return self._process_brotli(data)
+        try:
+            # 限制解压输出，避免高压缩比的响应在内存中展开
+            return self._decoder.decompress(data, len(self.buffer) - self.size)
+        except zlib.error:
+            # 部分服务器的deflate不带zlib头
+            if not self._raw_deflate or self.size:
+                raise
+            self._raw_deflate = False
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decoder.decompress(data, len(self.buffer))
+
+    def _process_brotli(self, data: bytes) -> bytes:
+        """与gzip/deflate一样限制解压输出，缓冲区写满后不再继续解压"""
+        if not _BROTLI_OUTPUT_LIMIT:
+            # 旧版brotli无法限制输出，请求时已不声明br，服务器仍返回时视为无法识别
+            raise brotli.error("brotli版本过旧，无法限制解压输出")
+        return self._decoder.process(data, output_buffer_limit=len(self.buffer) - self.size)
+
+    def feed(self, data: bytes) -> bool:
+        """写入一块原始数据，缓冲区已满时返回True"""
+        decoded = self._decode(data)
+        n = min(len(decoded), len(self.buffer) - self.size)
+        self.buffer[self.size:self.size + n] = decoded[:n]
+        self.size += n
+        return self.size >= len(self.buffer)
+
+    def content(self) -> bytes:
+        data = bytes(memoryview(self.buffer)[:self.size])
+        return data[len(_BOM):] if data.startswith(_BOM) else data
+
+    def kind(self, final: bool = False) -> str | None:
+        """根据已读取的内容判断类型：'playlist'、'media'、'unknown'，需要更多数据时返回None"""
+        head = self.content().lstrip()
+        if head.startswith(b'#EXTM3U'):
+            # 读到第一个完整的http地址行即可，否则读到结束或缓冲区满
+            return 'playlist' if final or self._has_url_line(head) else None
+        if head.startswith(b'FLV') or head[4:8] == b'ftyp' or head.startswith(b'ID3'):
+            return 'media'
+        if head[:1] == b'\x47':
+            # TS包以0x47同步字节开头，再确认下一个包，避免误判以G开头的文本
+            if len(head) > _TS_PACKET_SIZE:
+                return 'media' if head[_TS_PACKET_SIZE] == 0x47 else 'unknown'
+            return 'media' if final else None
+        if len(head) >= len(b'#EXTM3U') or final:
+            return 'unknown'
+        return None
+
+    def read(self, raw, chunk_size: int) -> str:
+        """从urllib3原始响应按块读取，识别出类型后立即返回"""
+        while True:
+            chunk = raw.read(chunk_size, decode_content=False)
+            if not chunk:
+                return self.kind(final=True)
+            full = self.feed(chunk)
+            kind = self.kind(final=full)
+            if kind is not None:
+                return kind
+
+    def first_url(self) -> str | None:
+        text = self.content().decode('utf-8', errors='replace')
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith('http'):
+                return line
+        return None
+
+    @staticmethod
+    def _has_url_line(head: bytes) -> bool:
+        index = head.find(b'\nhttp')
+        return index >= 0 and head.find(b'\n', index + 1) >= 0
 
 
 class HacksScraper(BaseIPTVScraper):
-    def __init__(self) -> None:
-        super().__init__()
-        self.session: requests.Session = requests.Session()
+    def __init__(self, transport: Transport | None = None) -> None:
+        super().__init__(transport)
         self.base_url: str = "https://iptvs.hacks.tools"
         self.headers: dict = HACKS_HEADERS  # 使用配置中的请求头
+        self.probe_config: dict = HACKS_PROBE_CONFIG
+
+    def iter_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> Iterator[List[IPTVChannel]]:
+        """实现Hacks平台频道抓取的核心逻辑，API只返回一页结果"""
+        cached = self._get_cached_page(keyword, 1)
+        if cached is not None:
+            logging.info(f"命中搜索缓存，获取到 {len(cached[0])} 条数据")
+            yield cached[0]
+            return
 
-    def fetch_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> List[IPTVChannel]:
-        """实现Hacks平台频道抓取的核心逻辑"""
-        channels = []
         try:
-            search_url = generate_search_url(keyword)
+            search_url = generate_search_url(keyword, self.base_url)
             logging.info(f"开始请求Hacks API: {search_url}")
             
-            response = self.session.get(
-                search_url,
-                headers=self.headers,
-                proxies=self.proxies if self.proxy_enabled else None,
-                timeout=10
-            )
-            
+            with self._stage('page_fetch'):
+                response = self.session.get(
+                    search_url,
+                    headers=self.headers,
+                    proxies=self.proxies if self.proxy_enabled else None,
+                    timeout=10
+                )
+
             if response.status_code == 200:
-                page_channels = self._parse_api_response(response.text)
-                channels.extend(page_channels)
+                with self._stage('parse'):
+                    page_channels = self._parse_api_response(response.text)
+                self._put_cached_page(keyword, 1, page_channels)
                 logging.info(f"请求成功，获取到 {len(page_channels)} 条数据")
             else:
                 logging.info(f"请求失败，状态码: {response.status_code}")
+                return
                 
         except requests.exceptions.Timeout:
             logging.info("Hacks API请求超时")
+            return
         except requests.exceptions.RequestException as e:
             logging.info(f"Hacks API网络请求异常: {str(e)}")
+            return
         except Exception as e:
             logging.info(f"抓取过程中发生异常: {str(e)}")
-        
-        return channels
+            return
+
+        yield page_channels
 
     def _parse_api_response(self, html: str) -> List[IPTVChannel]:
         """解析HTML页面中的频道信息"""
         channels = []
-        soup = BeautifulSoup(html, 'html.parser')
+        # 频道数据只在表格中，其余部分不参与解析
+        soup = make_soup(html, self.parser_backend, parse_only=SoupStrainer('table'))
         
         for row in soup.select('table tr'):
             tds = row.find_all('td')
@@ -81,108 +204,73 @@ class HacksScraper(BaseIPTVScraper):
         return channels
 
     def check_channel_availability(self, channel: IPTVChannel) -> bool:
-        """实现频道可用性检查"""
-        response = None
+        """实现频道可用性检查：只发一次流式请求，读取并解压响应开头至多max_bytes字节，
+        识别出播放列表或媒体流后立即停止读取"""
+        start_time = time.time()
+        # 探测过程中channel.url可能被改写为真实地址，超时统计按原地址的主机记录
+        url = channel.url
+        headers = self.headers.copy()
+        headers['Accept-Encoding'] = _ACCEPT_ENCODING
         try:
-            start_time = time.time()
-            headers = self.headers.copy()
-            headers['Accept-Encoding'] = 'gzip, deflate, br'
-
-            # 检查URL是否为直接可用的非m3u8格式
-            if not channel.url.lower().endswith('.m3u8'):
-                direct_response = requests.get(
-                    channel.url,
-                    timeout=3,
-                    proxies=self.proxies if self.proxy_enabled else None,
-                    stream=True,
-                    allow_redirects=True,
-                    headers=headers,
-                    verify=False
-                )
-                
-                content_type = direct_response.headers.get('Content-Type', '').lower()
-                if direct_response.status_code in (200, 206) and any(x in content_type for x in ['video', 'audio', 'mpegurl']):
+            with self._stream(url, headers) as response:
+                observe_probe(url, response.elapsed.total_seconds())
+                if response.status_code not in (200, 206):
+                    return False
+
+                # 非m3u8地址的Content-Type已表明是音视频流，无需读取内容
+                content_type = response.headers.get('Content-Type', '').lower()
+                if not url.lower().endswith('.m3u8') and any(x in content_type for x in ['video', 'audio', 'mpegurl']):
                     channel.response_time = round(time.time() - start_time, 2)
-                    direct_response.close()
                     return True
-                direct_response.close()
-
-            response = requests.get(
-                channel.url,
-                timeout=3,
-                proxies=self.proxies if self.proxy_enabled else None,
-                stream=False,
-                allow_redirects=True,
-                headers=headers,
-                verify=False
-            )
-            
-            if response.status_code not in (200, 206):
-                return False
-
-            content = self._decompress_response(response)
 
-            try:
-                decoded_content = content.decode('utf-8-sig')
-            except UnicodeDecodeError:
-                decoded_content = content.decode('utf-8', errors='replace')
-            
-            decoded_content = decoded_content.replace('\r\n', '\n')
-            
-            # 检查是否为M3U8格式
-            if '#EXTM3U' in decoded_content:
-                channel.response_time = round(time.time() - start_time, 2)
-                
-                # 解析内容获取真实URL
-                lines = decoded_content.strip().split('\n')
-                for line in lines:
-                    if line.startswith('http'):
-                        real_url = line.strip()
-                        # 更新channel的URL为真实地址
-                        channel.url = real_url
-                        # 测试真实URL
-                        try:
-                            real_response = self.session.get(
-                                real_url,
-                                headers=headers,
-                                timeout=3,
-                                verify=False,
-                                stream=False
-                            )
-                            if real_response.status_code in (200, 206):
-                                return True
-                        except:
-                            pass
-                        break
-            else:
-                return False
-            
-            return False
-                
+                body = _BoundedBody(response.headers.get('Content-Encoding'), self.probe_config['max_bytes'])
+                kind = body.read(response.raw, self.probe_config['chunk_size'])
         except requests.exceptions.Timeout:
+            observe_probe(url, None)
             return False
-        except requests.exceptions.ConnectionError:
+        except ReadTimeoutError:
+            # 读取响应体时直接使用urllib3的原始响应，超时不会被包装为requests的异常
+            observe_probe(url, None)
+            mark_failure('timeout')
             return False
-        except Exception as e:
+        except urllib3.exceptions.HTTPError:
+            mark_failure('connect')
+            return False
+        except (requests.exceptions.RequestException, OSError, zlib.error, brotli.error):
             return False
-        finally:
-            if response:
-                try:
-                    response.close()
-                except:
-                    pass
-
-    def _decompress_response(self, response):
+
+        if kind == 'media':
+            channel.response_time = round(time.time() - start_time, 2)
+            return True
+        if kind != 'playlist':
+            mark_failure('empty_body' if body.size == 0 else 'invalid_body')
+            return False
+
+        channel.response_time = round(time.time() - start_time, 2)
+        real_url = body.first_url()
+        if real_url is None:
+            mark_failure('invalid_body')
+            return False
+        # 更新channel的URL为真实地址，并确认真实地址可以打开
+        channel.url = real_url
         try:
-            if response.headers.get('Content-Encoding') == 'br':
-                # 添加分块解压处理
-                decompressor = brotli.Decompressor()
-                content = b""
-                for chunk in response.iter_content(chunk_size=1024):
-                    content += decompressor.process(chunk)
-                return content
-            return response.content
-        except brotli.error as e:
-            return response.content
-        except Exception as e:
-            return response.content
+            with self._stream(real_url, headers) as real_response:
+                return real_response.status_code in (200, 206)
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError):
+            return False
+
+    def supports_async_probe(self) -> bool:
+        # 需要识别播放列表/媒体特征并改写为真实地址，通用的异步探测无法做到
+        return False
+
+    def _stream(self, url: str, headers: dict) -> requests.Response:
+        """流式请求，只读取响应头，内容由调用方按需读取"""
+        return self.session.get(
+            url,
+            timeout=probe_timeout(url),
+            proxies=self.proxies if self.proxy_enabled else None,
+            stream=True,
+            allow_redirects=True,
+            headers=headers,
+            verify=False
+        )
@@ -0,0 +1,155 @@
+import logging
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+from base_scraper import IPTVChannel
+from config import HLS_PROBE_CONFIG
+from transport import Transport, get_default_transport
+
+# 只匹配BANDWIDTH，不匹配AVERAGE-BANDWIDTH
+_BANDWIDTH_RE = re.compile(r'(?<![-A-Z])BANDWIDTH=(\d+)')
+_CHUNK_SIZE = 64 * 1024
+_MAX_PLAYLIST_BYTES = 1024 * 1024
+
+
+def parse_playlist(text: str, base_url: str) -> Tuple[List[Tuple[int, str]], List[str]]:
+    """解析m3u8，返回 (子播放列表[(声明码率, 地址)], 媒体分片地址)，相对地址按base_url补全"""
+    variants = []
+    segments = []
+    bandwidth = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF'):
+            match = _BANDWIDTH_RE.search(line)
+            bandwidth = int(match.group(1)) if match else 0
+        elif line.startswith('#'):
+            continue
+        elif bandwidth is not None:
+            variants.append((bandwidth, urljoin(base_url, line)))
+            bandwidth = None
+        else:
+            segments.append(urljoin(base_url, line))
+    return variants, segments
+
+
+def smoothness(channel: IPTVChannel) -> Optional[float]:
+    """实测吞吐量与声明码率之比，>=1表示可以流畅播放；未声明码率时与默认码率比较"""
+    if channel.throughput is None:
+        return None
+    bitrate = channel.bandwidth or HLS_PROBE_CONFIG['default_bitrate']
+    return channel.throughput / bitrate
+
+
+def quality_key(channel: IPTVChannel) -> Tuple[int, float]:
+    """深度测速的排序键：可流畅播放的按响应时间排在前面，其余按吞吐比降序，未测出吞吐量的排在最后"""
+    ratio = smoothness(channel)
+    if ratio is None:
+        return 2, channel.response_time or 0
+    if ratio >= 1:
+        return 0, channel.response_time or 0
+    return 1, -ratio
+
+
+class HLSProbe:
+    """深度测速：解析m3u8，从主播放列表选择码率最高的子播放列表，下载最新的若干媒体分片并计算持续吞吐量"""
+
+    def __init__(self, transport: Optional[Transport] = None,
+                 headers: Dict[str, str] | None = None, proxies: Dict[str, str] | None = None,
+                 timeout: Tuple[float, float] = HLS_PROBE_CONFIG['timeout'],
+                 max_segments: int = HLS_PROBE_CONFIG['max_segments'],
+                 segment_bytes: int = HLS_PROBE_CONFIG['segment_bytes']):
+        self.transport = transport or get_default_transport()
+        self.headers = headers
+        self.proxies = proxies
+        self.timeout = timeout
+        self.max_segments = max_segments
+        self.segment_bytes = segment_bytes
+
+    def measure(self, channel: IPTVChannel) -> bool:
+        """测量频道吞吐量，结果写入channel.throughput与channel.bandwidth（单位bps）"""
+        try:
+            result = self._measure(channel.url)
+        except (requests.RequestException, OSError) as e:
+            logging.debug(f"深度测速失败 {channel.url}: {str(e)}")
+            result = None
+        if result is None:
+            return False
+        channel.throughput, channel.bandwidth = result
+        return True
+
+    def _measure(self, url: str) -> Optional[Tuple[float, Optional[int]]]:
+        bandwidth = None
+        # 主播放列表 -> 子播放列表 -> 分片，最多跟随两层
+        for _ in range(2):
+            with self._get(url) as response:
+                if response.status_code not in (200, 206):
+                    return None
+                chunks = response.iter_content(_CHUNK_SIZE)
+                first = next(chunks, b'')
+                if not first.lstrip(b'\xef\xbb\xbf \r\n').startswith(b'#EXTM3U'):
+                    # 非播放列表（如直连的ts/flv流），直接按流测速
+                    size, elapsed = self._read(first, chunks)
+                    throughput = self._rate(size, elapsed)
+                    return None if throughput is None else (throughput, bandwidth)
+                content = self._read_playlist(first, chunks)
+                url = response.url
+
+            variants, segments = parse_playlist(content.decode('utf-8', errors='replace'), url)
+            if variants:
+                bandwidth, url = max(variants)
+                continue
+            if not segments:
+                return None
+            # 所有分片均下载失败时视为测速失败，不写入带宽
+            throughput = self._measure_segments(segments[-self.max_segments:])
+            return None if throughput is None else (throughput, bandwidth)
+        return None
+
+    def _measure_segments(self, segments: List[str]) -> Optional[float]:
+        """直播列表末尾的分片最新，依次下载并累计字节数与耗时"""
+        total_size = 0
+        total_elapsed = 0.0
+        for segment_url in segments:
+            with self._get(segment_url) as response:
+                if response.status_code not in (200, 206):
+                    continue
+                chunks = response.iter_content(_CHUNK_SIZE)
+                size, elapsed = self._read(b'', chunks)
+                total_size += size
+                total_elapsed += elapsed
+        return self._rate(total_size, total_elapsed)
+
+    def _get(self, url: str) -> requests.Response:
+        return self.transport.session.get(url, headers=self.headers, proxies=self.proxies, timeout=self.timeout,
+                                stream=True, allow_redirects=True)
+
+    def _read(self, first: bytes, chunks) -> Tuple[int, float]:
+        """从收到响应头开始计时，读取至多segment_bytes字节"""
+        start = time.time()
+        size = len(first)
+        for chunk in chunks:
+            size += len(chunk)
+            if size >= self.segment_bytes:
+                break
+        return size, time.time() - start
+
+    @staticmethod
+    def _read_playlist(first: bytes, chunks) -> bytes:
+        content = bytearray(first)
+        for chunk in chunks:
+            content += chunk
+            if len(content) >= _MAX_PLAYLIST_BYTES:
+                break
+        return bytes(content)
+
+    @staticmethod
+    def _rate(size: int, elapsed: float) -> Optional[float]:
+        if size <= 0:
+            return None
+        return size * 8 / max(elapsed, 1e-3)
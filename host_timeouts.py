@@ -0,0 +1,124 @@
+import threading
+from typing import Dict, Optional, Tuple
+
+from cancellation import current_scope
+from config import ADAPTIVE_TIMEOUT_CONFIG
+from url_utils import host_key
+
+# 截止时间将到时仍保留的最短超时，避免传入0或负数
+_MIN_TIMEOUT = 0.05
+
+
+class _LatencyStats:
+    """单个主机的耗时统计：EWMA均值与平均偏差，计算方式与TCP重传超时相同"""
+    __slots__ = ('mean', 'deviation')
+
+    def __init__(self, sample: float):
+        self.mean = sample
+        self.deviation = sample / 2
+
+    def update(self, sample: float, alpha: float) -> None:
+        self.deviation = (1 - alpha) * self.deviation + alpha * abs(sample - self.mean)
+        self.mean = (1 - alpha) * self.mean + alpha * sample
+
+
+class _HostState:
+    __slots__ = ('connect', 'first_byte', 'failures')
+
+    def __init__(self):
+        self.connect: Optional[_LatencyStats] = None
+        self.first_byte: Optional[_LatencyStats] = None
+        self.failures = 0
+
+
+class HostTimeouts:
+    """按主机记录连接与首字节耗时，据此给出每次探测的超时：
+    响应快的主机缩短超时，慢但可用的主机放宽到上限，连续超时且从未成功的主机直接使用下限"""
+
+    def __init__(self, config: Dict = ADAPTIVE_TIMEOUT_CONFIG):
+        self.default = tuple(config['default'])
+        self.alpha = config['alpha']
+        self.deviation_factor = config['deviation_factor']
+        self.connect_range = tuple(config['connect_range'])
+        self.read_range = tuple(config['read_range'])
+        self.failure_threshold = config['failure_threshold']
+        self._hosts: Dict[str, _HostState] = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, url: str) -> Tuple[float, float]:
+        """返回 (连接超时, 读取超时)"""
+        with self._lock:
+            state = self._hosts.get(host_key(url))
+            if state is None:
+                return self.default
+            if state.first_byte is None:
+                if state.failures >= self.failure_threshold:
+                    return self.connect_range[0], self.read_range[0]
+                return self.default
+            # 未单独测得连接耗时时，用首字节耗时（包含连接）估计
+            connect_stats = state.connect or state.first_byte
+            connect = self._bound(connect_stats, self.connect_range)
+            read = self._bound(state.first_byte, self.read_range)
+        return connect, read
+
+    def observe(self, url: str, first_byte: float, connect: float | None = None) -> None:
+        """记录一次成功探测的首字节耗时（及连接耗时）"""
+        with self._lock:
+            state = self._hosts.setdefault(host_key(url), _HostState())
+            state.failures = 0
+            if state.first_byte is None:
+                state.first_byte = _LatencyStats(first_byte)
+            else:
+                state.first_byte.update(first_byte, self.alpha)
+            if connect is not None:
+                if state.connect is None:
+                    state.connect = _LatencyStats(connect)
+                else:
+                    state.connect.update(connect, self.alpha)
+
+    def observe_failure(self, url: str) -> None:
+        """记录一次超时"""
+        with self._lock:
+            self._hosts.setdefault(host_key(url), _HostState()).failures += 1
+
+    def _bound(self, stats: _LatencyStats, bounds: Tuple[float, float]) -> float:
+        floor, ceiling = bounds
+        return min(ceiling, max(floor, stats.mean + self.deviation_factor * stats.deviation))
+
+
+_default_timeouts: HostTimeouts | None = None
+_default_lock = threading.Lock()
+
+
+def get_host_timeouts() -> HostTimeouts:
+    """进程内共享的主机超时统计"""
+    global _default_timeouts
+    with _default_lock:
+        if _default_timeouts is None:
+            _default_timeouts = HostTimeouts()
+        return _default_timeouts
+
+
+def probe_timeout(url: str) -> Tuple[float, float]:
+    """探测url时使用的超时，未启用自适应超时时返回默认值；
+    当前线程的取消范围设有截止时间时，超时不超过剩余时间"""
+    if not ADAPTIVE_TIMEOUT_CONFIG['enabled']:
+        connect, read = ADAPTIVE_TIMEOUT_CONFIG['default']
+    else:
+        connect, read = get_host_timeouts().timeout(url)
+    scope = current_scope()
+    left = scope.remaining() if scope is not None else None
+    if left is not None:
+        left = max(_MIN_TIMEOUT, left)
+        connect, read = min(connect, left), min(read, left)
+    return connect, read
+
+
+def observe_probe(url: str, first_byte: float | None, connect: float | None = None) -> None:
+    """记录探测耗时，first_byte为None表示超时"""
+    if not ADAPTIVE_TIMEOUT_CONFIG['enabled']:
+        return
+    if first_byte is None:
+        get_host_timeouts().observe_failure(url)
+    else:
+        get_host_timeouts().observe(url, first_byte, connect)
@@ -2,75 +2,115 @@ import json
 import logging
 import time
 import requests
-from typing import List
+from typing import Iterator, List
 from base_scraper import BaseIPTVScraper, IPTVChannel
-from config import IPTV365_HEADERS
+from transport import Transport
+from host_timeouts import observe_probe, probe_timeout
+from metrics import mark_failure
+from config import IPTV365_HEADERS, SEARCH_CACHE_CONFIG
+from json_stream import iter_json_array
+
+STREAM_CHUNK_SIZE = 16 * 1024
 
 class IPTV365Scraper(BaseIPTVScraper):
-    def __init__(self):
-        super().__init__()
-        self.session = requests.Session()
+    def __init__(self, transport: Transport | None = None):
+        super().__init__(transport)
         self.base_url = "https://search.iptv365.org/"
         self.headers = IPTV365_HEADERS
 
-    def fetch_channels(self, keyword: str, page_count: int = 1, random_mode: bool = False) -> List[IPTVChannel]:
+    def iter_channels(self, keyword: str, page_count: int = 1, random_mode: bool = False) -> Iterator[List[IPTVChannel]]:
         """
-        获取频道列表
+        逐个订阅源产出频道列表
         注意：此抓取器忽略page_count和random_mode参数，因为API不支持分页
         """
-        channels = []
         logging.info(f"开始从 IPTV365 获取频道信息: {keyword}")
+        cached = self._get_cached_page(keyword, 1)
+        if cached is not None:
+            logging.info(f"命中搜索缓存，共 {len(cached[0])} 个频道")
+            yield cached[0]
+            return
 
         try:
-            payload = {
-                "searchTerm": keyword
-            }
+            source_count = 0
+            channel_count = 0
+            # 待写入搜索缓存的频道，超过max_page_channels后放弃缓存，内存占用不随响应大小增长
+            cache_limit = SEARCH_CACHE_CONFIG['max_page_channels']
+            cached_channels: List[IPTVChannel] | None = [] if self.search_cache is not None else None
+            for source_channels in self._iter_sources(keyword):
+                source_count += 1
+                channel_count += len(source_channels)
+                if cached_channels is not None:
+                    if channel_count > cache_limit:
+                        logging.debug(f"IPTV365结果超过 {cache_limit} 个频道，不写入搜索缓存")
+                        cached_channels = None
+                    else:
+                        cached_channels.extend(source_channels)
+                yield source_channels
+
+            if cached_channels is not None:
+                self._put_cached_page(keyword, 1, cached_channels)
+            logging.info(f"IPTV365抓取完成，共获取到 {source_count} 个订阅源，{channel_count} 个频道")
+
+        except Exception as e:
+            logging.error(f"抓取过程发生错误: {str(e)}")
 
+    def fetch_channels(self, keyword: str, page_count: int = 1, random_mode: bool = False) -> List[IPTVChannel]:
+        return super().fetch_channels(keyword, page_count, random_mode)
+
+    def _iter_sources(self, keyword: str) -> Iterator[List[IPTVChannel]]:
+        """流式解析响应，每接收完一个订阅源就产出其中的频道"""
+        payload = {
+            "searchTerm": keyword
+        }
+
+        # 流式响应，page_fetch阶段只计到收到响应头，响应体边接收边解析
+        with self._stage('page_fetch'):
             response = self.session.post(
                 self.base_url,
                 data=json.dumps(payload),
                 headers=self.headers,
-                proxies=self.proxies if self.proxy_enabled else None
+                proxies=self.proxies if self.proxy_enabled else None,
+                stream=True
             )
 
+        try:
             if response.status_code != 200:
                 logging.error(f"请求失败，状态码: {response.status_code}")
-                return channels
+                return
 
-            data = response.json()
-            
-            # 处理返回的数据
-            for source in data:
-                source_url = source.get("url", "")
-                lines = source.get("lines", [])
-                
-                for line in lines:
-                    # 解析频道信息
-                    try:
-                        channel_name, url = line.split(",", 1)
-                        channel_name = channel_name.strip()
-                        url = url.strip()
-                        
-                        # 检测并移除URL中$符号后的内容
-                        if '$' in url:
-                            url = url.split('$', 1)[0]
-                        
-                        if url:  # 确保URL不为空
-                            channel = IPTVChannel(
-                                channel_name=channel_name,
-                                url=url,
-                            )
-                            channels.append(channel)
-                    except ValueError:
-                        logging.warning(f"无法解析频道信息: {line}")
-                        continue
-
-            logging.info(f"IPTV365抓取完成，共获取到 {len(data)} 个订阅源，{len(channels)} 个频道")
+            for source in iter_json_array(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)):
+                channels = []
+                for line in source.get("lines", []):
+                    channel = self._parse_line(line)
+                    if channel:
+                        channels.append(channel)
+                logging.debug(f"订阅源 {source.get('url', '')} 解析完毕，获取到 {len(channels)} 个频道")
+                yield channels
+        finally:
+            response.close()
 
-        except Exception as e:
-            logging.error(f"抓取过程发生错误: {str(e)}")
-            
-        return channels
+    @staticmethod
+    def _parse_line(line: str) -> IPTVChannel | None:
+        """解析 频道名,URL 格式的一行"""
+        try:
+            channel_name, url = line.split(",", 1)
+        except ValueError:
+            logging.warning(f"无法解析频道信息: {line}")
+            return None
+
+        channel_name = channel_name.strip()
+        url = url.strip()
+
+        # 检测并移除URL中$符号后的内容
+        if '$' in url:
+            url = url.split('$', 1)[0]
+
+        if not url:  # 确保URL不为空
+            return None
+        return IPTVChannel(
+            channel_name=channel_name,
+            url=url,
+        )
 
     def check_channel_availability(self, channel: IPTVChannel) -> bool:
         """检查频道可用性"""
@@ -79,10 +119,12 @@ class IPTV365Scraper(BaseIPTVScraper):
             response = self.session.get(
                 channel.url,
                 headers=self.headers,
-                timeout=(3.05, 4.5),
+                timeout=probe_timeout(channel.url),
                 proxies=self.proxies if self.proxy_enabled else None,
                 stream=True
             )
+            # 记录首字节耗时，用于调整该主机后续的超时
+            observe_probe(channel.url, response.elapsed.total_seconds())
 
             if response.status_code not in (200, 206):
                 logging.debug(f"无效响应[{response.status_code}]: {channel.url}")
@@ -90,6 +132,7 @@ class IPTV365Scraper(BaseIPTVScraper):
 
             chunk = response.raw.read(512, decode_content=True)
             if not chunk:
+                mark_failure('empty_body')
                 logging.debug(f"空数据响应: {channel.url}")
                 return False
 
@@ -101,6 +144,10 @@ class IPTV365Scraper(BaseIPTVScraper):
             channel.response_time = response_time
             return True
             
+        except requests.exceptions.Timeout as e:
+            observe_probe(channel.url, None)
+            logging.debug(f"连接超时 {channel.url}: {str(e)}")
+            return False
         except Exception as e:
             logging.debug(f"连接错误 {channel.url}: {str(e)}")
             return False
@@ -0,0 +1,135 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Optional
+
+_NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+# 对象/数组内部只需关注括号与字符串起止，其余字符由正则直接跳过
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[,\] \t\n\r]')
+
+
+class JSONArrayStream:
+    """增量解析顶层为数组的JSON，内存中只保留当前未完成的元素。
+    扫描时记录嵌套深度与字符串状态，每个字符只扫描一次，元素完整后才解码"""
+
+    def __init__(self, encoding: str = 'utf-8'):
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        # 当前未完成元素的各段文本
+        self._parts: List[str] = []
+        self._in_element = False
+        self._scalar = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.started = False
+        self.finished = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        """写入一段数据，返回其中已完整的数组元素"""
+        text = self._text_decoder.decode(chunk, final=final)
+        values = []
+        pos = 0
+        start = 0
+        while pos < len(text) and not self.finished:
+            if not self._in_element:
+                match = _NON_WHITESPACE.search(text, pos)
+                if match is None:
+                    break
+                pos = match.start()
+                char = text[pos]
+                if not self.started:
+                    if char != '[':
+                        raise ValueError("JSON顶层不是数组")
+                    self.started = True
+                    pos += 1
+                    continue
+                if char == ',':
+                    pos += 1
+                    continue
+                if char == ']':
+                    self.finished = True
+                    break
+                self._begin(char)
+                start = pos
+                if not self._scalar:
+                    pos += 1
+            end = self._scan(text, pos)
+            if end is None:
+                self._parts.append(text[start:])
+                break
+            self._parts.append(text[start:end])
+            values.append(self._decode())
+            pos = end
+        # 数据结束时，末尾的标量到此才完整；未完成的对象或数组在此抛出JSONDecodeError
+        if final and self._in_element:
+            values.append(self._decode())
+        return values
+
+    def _begin(self, char: str) -> None:
+        self._in_element = True
+        self._scalar = char not in '{["'
+        self._depth = 1 if char in '{[' else 0
+        self._in_string = char == '"'
+        self._escaped = False
+
+    def _scan(self, text: str, pos: int) -> Optional[int]:
+        """从pos继续扫描当前元素，返回元素结束后的位置，元素未结束时返回None"""
+        if self._scalar:
+            # 数字、true等标量在分隔符处结束，可能被分块截断
+            match = _SCALAR_END.search(text, pos)
+            return None if match is None else match.start()
+        while True:
+            if self._in_string:
+                if self._escaped:
+                    # 上一块以反斜杠结尾，跳过被转义的字符
+                    self._escaped = False
+                    pos += 1
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    return None
+                if match.group() == '\\':
+                    if match.end() >= len(text):
+                        self._escaped = True
+                        return None
+                    pos = match.end() + 1
+                    continue
+                self._in_string = False
+                pos = match.end()
+                if self._depth == 0:
+                    return pos
+                continue
+            match = _STRUCTURE.search(text, pos)
+            if match is None:
+                return None
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    return pos
+
+    def _decode(self) -> Any:
+        text = ''.join(self._parts)
+        self._parts = []
+        self._in_element = False
+        return self._decoder.decode(text)
+
+
+def iter_json_array(chunks: Iterable[bytes], encoding: str = 'utf-8') -> Iterator[Any]:
+    """逐个产出JSON数组的元素，数据仍在传输时即可开始处理"""
+    stream = JSONArrayStream(encoding)
+    for chunk in chunks:
+        if chunk:
+            yield from stream.feed(chunk)
+        if stream.finished:
+            return
+    yield from stream.feed(b'', final=True)
+    if not stream.finished:
+        raise ValueError("JSON数组不完整")
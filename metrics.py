@@ -0,0 +1,293 @@
+import bisect
+import json
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from urllib3.exceptions import ClosedPoolError
+
+from config import METRICS_CONFIG
+
+try:
+    from urllib3.exceptions import NameResolutionError
+except ImportError:  # urllib3 1.x没有单独的域名解析异常
+    NameResolutionError = None
+
+# 探测失败的分类
+FAILURE_CLASSES = ('dns', 'connect', 'timeout', 'http_status', 'empty_body', 'invalid_body', 'cancelled', 'other')
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class _Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Prometheus格式的累计桶 [(上界, 数量)]，最后一个为+Inf"""
+        total = 0
+        buckets = []
+        for bound, count in zip(list(self.bounds) + [float('inf')], self.counts):
+            total += count
+            buckets.append(('+Inf' if bound == float('inf') else repr(float(bound)), total))
+        return buckets
+
+
+class Metrics:
+    """线程安全的计数器与直方图，按名称和标签区分，可导出为Prometheus文本或JSON"""
+
+    # 直方图名称 -> 桶上界所在的配置项
+    HISTOGRAMS = {
+        'iptv_request_seconds': 'latency_buckets',
+        'iptv_response_bytes': 'size_buckets',
+        'iptv_stage_seconds': 'latency_buckets',
+    }
+    HELP = {
+        'iptv_requests_total': '按数据源、阶段与状态码统计的HTTP请求数',
+        'iptv_request_errors_total': '按数据源、阶段与失败类型统计的HTTP请求异常数',
+        'iptv_request_seconds': 'HTTP请求耗时（秒）',
+        'iptv_response_bytes': 'HTTP响应体字节数，流式响应按Content-Length计',
+        'iptv_stage_seconds': '各阶段（获取city参数、抓取页面、解析、测速）耗时（秒）',
+        'iptv_probe_outcomes_total': '按数据源与结果统计的测速次数',
+    }
+
+    def __init__(self, config: Dict = METRICS_CONFIG):
+        self.buckets = {name: tuple(config[key]) for name, key in self.HISTOGRAMS.items()}
+        self._counters: Dict[str, Dict[_Labels, float]] = {}
+        self._histograms: Dict[str, Dict[_Labels, _Histogram]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets[name])
+            histogram.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前所有指标的JSON快照"""
+        with self._lock:
+            counters = {
+                name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{'labels': dict(key), 'count': h.count, 'sum': h.sum, 'buckets': dict(h.cumulative())}
+                       for key, h in series.items()]
+                for name, series in self._histograms.items()
+            }
+        return {'timestamp': time.time(), 'counters': counters, 'histograms': histograms}
+
+    def to_prometheus(self) -> str:
+        """Prometheus文本格式"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# HELP {name} {self.HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} counter')
+                for key, value in series.items():
+                    lines.append(f'{name}{_format_labels(key)} {value:g}')
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# HELP {name} {self.HELP.get(name, name)}')
+                lines.append(f'# TYPE {name} histogram')
+                for key, h in series.items():
+                    for bound, count in h.cumulative():
+                        lines.append(f'{name}_bucket{_format_labels(key + (("le", bound),))} {count}')
+                    lines.append(f'{name}_sum{_format_labels(key)} {h.sum:g}')
+                    lines.append(f'{name}_count{_format_labels(key)} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_snapshot(self, filepath: str) -> None:
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+def _format_labels(key: _Labels) -> str:
+    if not key:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in key) + '}'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_default_metrics: Metrics | None = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """进程内共享的指标"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = Metrics()
+        return _default_metrics
+
+
+# 当前线程所处的 (数据源, 阶段)，以及阶段内最近一次失败的类型
+_local = threading.local()
+
+
+@contextmanager
+def stage(source: str, name: str) -> Iterator[None]:
+    """标记当前线程所处的阶段，期间发出的请求计入该数据源与阶段，并记录阶段耗时"""
+    if not METRICS_CONFIG['enabled']:
+        yield
+        return
+    previous = getattr(_local, 'stage', None)
+    _local.stage = (source, name)
+    _local.failure = None
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(source, name, time.perf_counter() - start)
+        _local.stage = previous
+
+
+def record_stage(source: str, name: str, elapsed: float) -> None:
+    """记录一次阶段耗时，用于无法使用stage()的场景（如事件循环中的异步探测）"""
+    if METRICS_CONFIG['enabled']:
+        get_metrics().observe('iptv_stage_seconds', elapsed, source=source, stage=name)
+
+
+def current_stage() -> Tuple[str, str]:
+    return getattr(_local, 'stage', None) or ('unknown', 'other')
+
+
+def mark_failure(kind: str) -> None:
+    """记录当前阶段的失败类型，如请求成功但响应体为空"""
+    _local.failure = kind
+
+
+def last_failure() -> Optional[str]:
+    return getattr(_local, 'failure', None)
+
+
+def classify_error(exc: BaseException) -> str:
+    """将请求异常归类为 dns/connect/timeout/cancelled/other"""
+    for cause in _causes(exc):
+        if isinstance(cause, socket.gaierror) or (NameResolutionError is not None
+                                                  and isinstance(cause, NameResolutionError)):
+            return 'dns'
+        if isinstance(cause, ClosedPoolError):
+            return 'cancelled'
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return 'connect'
+    if isinstance(exc, (requests.exceptions.Timeout, TimeoutError)):
+        return 'timeout'
+    if isinstance(exc, (requests.exceptions.ConnectionError, ConnectionError)):
+        return 'connect'
+    return 'other'
+
+
+def _causes(exc: Optional[BaseException]) -> Iterator[BaseException]:
+    """沿requests/urllib3的异常包装链展开：args[0]、reason、__cause__"""
+    seen = set()
+    pending = [exc]
+    while pending:
+        exc = pending.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        seen.add(id(exc))
+        yield exc
+        reason = getattr(exc, 'reason', None)
+        if isinstance(reason, BaseException):
+            pending.append(reason)
+        if exc.args and isinstance(exc.args[0], BaseException):
+            pending.append(exc.args[0])
+        pending.append(exc.__cause__ or exc.__context__)
+
+
+def record_response(response: requests.Response, elapsed: float, stream: bool) -> None:
+    """记录一次完成的HTTP请求"""
+    if not METRICS_CONFIG['enabled']:
+        return
+    source, name = current_stage()
+    metrics = get_metrics()
+    metrics.inc('iptv_requests_total', source=source, stage=name, status=str(response.status_code))
+    metrics.observe('iptv_request_seconds', elapsed, source=source, stage=name)
+    if stream:
+        size = int(response.headers.get('Content-Length') or 0)
+    else:
+        size = len(response.content)
+    metrics.observe('iptv_response_bytes', size, source=source, stage=name)
+    if response.status_code not in (200, 206):
+        mark_failure('http_status')
+
+
+def record_error(exc: BaseException, elapsed: float) -> None:
+    """记录一次失败的HTTP请求"""
+    if not METRICS_CONFIG['enabled']:
+        return
+    source, name = current_stage()
+    kind = classify_error(exc)
+    metrics = get_metrics()
+    metrics.inc('iptv_request_errors_total', source=source, stage=name, error=kind)
+    metrics.observe('iptv_request_seconds', elapsed, source=source, stage=name)
+    mark_failure(kind)
+
+
+def record_probe(source: str, outcome: str) -> None:
+    """记录一次测速结果，outcome为ok或FAILURE_CLASSES之一"""
+    if METRICS_CONFIG['enabled']:
+        get_metrics().inc('iptv_probe_outcomes_total', source=source, outcome=outcome)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split('?')[0] == '/metrics.json':
+            body = json.dumps(get_metrics().snapshot(), ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json; charset=utf-8'
+        elif self.path.split('?')[0] in ('/', '/metrics'):
+            body = get_metrics().to_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def serve_metrics(port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """在后台线程提供 /metrics（Prometheus文本）与 /metrics.json，返回的服务器可调用shutdown停止"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"指标服务已启动: http://{host}:{server.server_address[1]}/metrics")
+    return server
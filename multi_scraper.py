@@ -0,0 +1,87 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+from base_scraper import BaseIPTVScraper, IPTVChannel
+from config import DEFAULT_HEADERS
+from transport import Transport
+
+ALL_SOURCES = "全部"
+
+
+class MultiSourceScraper(BaseIPTVScraper):
+    """并发调用多个抓取器，按完成顺序合并结果"""
+
+    def __init__(self, scrapers: Dict[str, BaseIPTVScraper], transport: Transport | None = None):
+        super().__init__(transport)
+        self.scrapers = scrapers
+        self.headers = DEFAULT_HEADERS
+
+    def iter_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> Iterator[List[IPTVChannel]]:
+        """并发迭代各数据源，任一数据源产出一页即转交调用方"""
+        logging.info(f"开始并发搜索全部数据源: {', '.join(self.scrapers.keys())}")
+        batches = queue.Queue()
+        done = object()
+        # 调用方提前关闭生成器时通知各数据源在当前页抓取完后停止
+        closed = threading.Event()
+
+        def produce(name: str, scraper: BaseIPTVScraper) -> None:
+            count = 0
+            try:
+                for page_channels in scraper.iter_channels(keyword, page_count, random_mode):
+                    if closed.is_set():
+                        break
+                    # 记录频道来源，测速时交由对应的抓取器检测
+                    for channel in page_channels:
+                        channel.source = name
+                    count += len(page_channels)
+                    batches.put(page_channels)
+                else:
+                    logging.info(f"[{name}] 抓取完成，获取到 {count} 条数据")
+            except Exception as e:
+                logging.error(f"[{name}] 抓取失败: {str(e)}")
+            finally:
+                batches.put(done)
+
+        # 不使用with语句：提前关闭时不等待仍在抓取的数据源
+        executor = ThreadPoolExecutor(max_workers=len(self.scrapers))
+        try:
+            for name, scraper in self.scrapers.items():
+                executor.submit(produce, name, scraper)
+
+            total = 0
+            remaining = len(self.scrapers)
+            while remaining:
+                item = batches.get()
+                if item is done:
+                    remaining -= 1
+                    continue
+                total += len(item)
+                yield item
+            logging.info(f"全部数据源抓取完成，共合并 {total} 条数据")
+        finally:
+            closed.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def check_channel_availability(self, channel: IPTVChannel) -> bool:
+        scraper = self.scrapers.get(channel.source)
+        if scraper is None:
+            logging.debug(f"未知的频道来源[{channel.source}]: {channel.url}")
+            return False
+        return scraper.check_channel_availability(channel)
+
+    def supports_async_probe(self) -> bool:
+        return all(scraper.supports_async_probe() for scraper in self.scrapers.values())
+
+    def source_name(self, channel: IPTVChannel) -> str:
+        scraper = self.scrapers.get(channel.source)
+        return scraper.name if scraper is not None else self.name
+
+    def set_proxy(self, proxy_url: str, proxy_type: str = 'http') -> None:
+        super().set_proxy(proxy_url, proxy_type)
+        # 子抓取器可能使用独立的传输层
+        for scraper in self.scrapers.values():
+            if scraper.transport is not self.transport:
+                scraper.set_proxy(proxy_url, proxy_type)
@@ -0,0 +1,35 @@
+import logging
+from typing import Optional, Union
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from config import HTML_PARSER_BACKEND
+
+# lxml为可选依赖，未安装时退回内置的html.parser
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+BACKENDS = ('auto', 'lxml', 'html.parser')
+
+
+def resolve_backend(backend: str = HTML_PARSER_BACKEND) -> str:
+    """将配置的解析后端转换为BeautifulSoup可用的解析器名称"""
+    if backend not in BACKENDS:
+        raise ValueError(f"不支持的解析后端: {backend}")
+    if backend == 'auto':
+        return 'lxml' if HAS_LXML else 'html.parser'
+    if backend == 'lxml' and not HAS_LXML:
+        logging.warning("未安装lxml，使用html.parser解析")
+        return 'html.parser'
+    return backend
+
+
+def make_soup(markup: Union[str, bytes, BeautifulSoup], backend: str = HTML_PARSER_BACKEND,
+              parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """解析HTML，已解析的soup原样返回，避免同一页面重复解析"""
+    if isinstance(markup, BeautifulSoup):
+        return markup
+    return BeautifulSoup(markup, resolve_backend(backend), parse_only=parse_only)
@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import PROBE_CACHE_CONFIG
+from url_utils import canonicalize_url
+
+
+class ProbeCache:
+    """持久化的测速结果缓存，可用与不可用结果分别设置有效期"""
+
+    def __init__(self, filepath: str | None = PROBE_CACHE_CONFIG['filename'],
+                 alive_ttl: float = PROBE_CACHE_CONFIG['alive_ttl'],
+                 dead_ttl: float = PROBE_CACHE_CONFIG['dead_ttl']):
+        self.filepath = filepath
+        self.alive_ttl = alive_ttl
+        self.dead_ttl = dead_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+            logging.info(f"已加载测速缓存 {len(self._entries)} 条")
+        except (OSError, ValueError) as e:
+            logging.warning(f"测速缓存读取失败，将重新建立: {str(e)}")
+            self._entries = {}
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        ttl = self.alive_ttl if entry['alive'] else self.dead_ttl
+        return now - entry['timestamp'] < ttl
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """返回未过期的缓存记录，不存在或已过期时返回None"""
+        key = canonicalize_url(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry, time.time()):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def put(self, url: str, alive: bool, response_time: float | None = None,
+            throughput: float | None = None, bandwidth: int | None = None) -> None:
+        key = canonicalize_url(url)
+        entry = {
+            'alive': alive,
+            'response_time': response_time,
+            'timestamp': time.time()
+        }
+        if throughput is not None:
+            entry['throughput'] = throughput
+            entry['bandwidth'] = bandwidth
+        with self._lock:
+            self._entries[key] = entry
+
+    def save(self) -> None:
+        """清理过期记录并写入磁盘"""
+        if not self.filepath:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if self._is_fresh(entry, now)}
+            entries = dict(self._entries)
+        try:
+            with open(self.filepath, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"测速缓存写入失败: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache: ProbeCache | None = None
+
+
+def get_default_cache() -> ProbeCache:
+    """进程内共享的测速缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ProbeCache()
+    return _default_cache
@@ -0,0 +1,46 @@
+import threading
+import time
+from typing import Dict
+
+from config import RATE_LIMIT_CONFIG
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器，rate为每秒补充的令牌数，burst为桶容量"""
+
+    def __init__(self, rate: float, burst: int):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate必须大于0，burst至少为1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: int = 1) -> None:
+        """阻塞直到获得指定数量的令牌"""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_limiters: Dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(source: str) -> TokenBucket:
+    """每个数据源共享一个限速器，未单独配置的数据源使用default配置"""
+    with _limiters_lock:
+        if source not in _limiters:
+            config = RATE_LIMIT_CONFIG.get(source, RATE_LIMIT_CONFIG['default'])
+            _limiters[source] = TokenBucket(config['rate'], config['burst'])
+        return _limiters[source]
@@ -0,0 +1,104 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import SEARCH_CACHE_CONFIG
+
+CHANNEL_FIELDS = ('url', 'channel_name', 'date', 'location', 'resolution')
+
+
+class SearchCache:
+    """搜索结果缓存，按 (数据源, 关键词, 页码) 缓存解析后的频道，支持TTL、LRU淘汰与持久化"""
+
+    def __init__(self, ttl: float = SEARCH_CACHE_CONFIG['ttl'],
+                 max_entries: int = SEARCH_CACHE_CONFIG['max_entries'],
+                 filepath: str | None = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.filepath = filepath
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(source: str, keyword: str, page: int) -> str:
+        return f"{source}|{keyword}|{page}"
+
+    def _load(self) -> None:
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            now = time.time()
+            for key, entry in entries.items():
+                if now - entry['timestamp'] < self.ttl:
+                    self._entries[key] = entry
+            logging.info(f"已加载搜索缓存 {len(self._entries)} 条")
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"搜索缓存读取失败，将重新建立: {str(e)}")
+            self._entries.clear()
+
+    def get(self, source: str, keyword: str, page: int) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """返回 (频道字典列表, 附加信息)，不存在或已过期时返回None"""
+        key = self._key(source, keyword, page)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry['timestamp'] >= self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['channels'], entry['meta']
+
+    def put(self, source: str, keyword: str, page: int, channels: List[Dict[str, Any]], **meta) -> None:
+        key = self._key(source, keyword, page)
+        with self._lock:
+            self._entries[key] = {'timestamp': time.time(), 'channels': channels, 'meta': meta}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        if not self.filepath:
+            return
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            with open(self.filepath, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"搜索缓存写入失败: {str(e)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_cache: SearchCache | None = None
+
+
+def get_default_search_cache() -> SearchCache:
+    """进程内共享的搜索缓存，启用持久化时在退出前写入磁盘"""
+    global _default_cache
+    if _default_cache is None:
+        filepath = SEARCH_CACHE_CONFIG['filename'] if SEARCH_CACHE_CONFIG['persist'] else None
+        _default_cache = SearchCache(filepath=filepath)
+        if filepath:
+            atexit.register(_default_cache.save)
+    return _default_cache
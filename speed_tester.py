@@ -1,88 +1,512 @@
+import asyncio
+import heapq
+import itertools
 import logging
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple, Callable, Dict, Any
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, List, Tuple, Callable, Dict, Any
 
+from async_prober import AsyncProber
+from cancellation import CancelScope, activate
 from base_scraper import IPTVChannel, BaseIPTVScraper
+from config import SPEED_TEST_CONFIG, PROBE_CACHE_CONFIG, PROBE_POOL_CONFIG, DNS_CACHE_CONFIG, PRIORITY_CONFIG
+from dns_cache import get_default_resolver
+from hls_probe import HLSProbe, quality_key
+from metrics import last_failure, record_probe, record_stage, stage
+from probe_cache import ProbeCache, get_default_cache
+from success_predictor import HostStats, SuccessPredictor, get_default_host_stats
+from url_utils import ChannelIndex, host_key
+
+
+class _ProbePlan:
+    """测速计划：逐批完成去重与缓存查询，测速结束后将结果展开到所有频道"""
+
+    def __init__(self, dedup: bool, cache: ProbeCache | None, deep_probe: bool = False,
+                 host_stats: HostStats | None = None):
+        self.index = ChannelIndex() if dedup else None
+        self.cache = cache
+        self.host_stats = host_stats
+        self.deep_probe = deep_probe
+        self.groups: Dict[int, List[IPTVChannel]] = {}
+        self.probe_urls: Dict[int, str] = {}
+        self.total = 0
+        self.unique = 0
+        self.cached_accessible: List[IPTVChannel] = []
+        self.cached_tested: List[IPTVChannel] = []
+
+    def add(self, channels: List[IPTVChannel]) -> List[IPTVChannel]:
+        """加入一批频道，返回其中需要探测的新地址"""
+        self.total += len(channels)
+        targets = []
+        for channel in channels:
+            # 相同播放地址只探测一次，结果回填到所有引用它的频道
+            if self.index is not None:
+                group = self.index.group(self.index.add(channel))
+                if len(group) > 1:
+                    continue
+                self.groups[id(channel)] = group
+            self.unique += 1
+
+            # 先查询测速缓存，命中的地址不再探测
+            entry = self.cache.get(channel.url) if self.cache is not None else None
+            # 深度测速时，缺少吞吐量的可用记录需要重新探测
+            if entry is not None and not (self.deep_probe and entry['alive'] and 'throughput' not in entry):
+                self.cached_tested.append(channel)
+                if entry['alive']:
+                    channel.response_time = entry['response_time']
+                    channel.throughput = entry.get('throughput')
+                    channel.bandwidth = entry.get('bandwidth')
+                    self.cached_accessible.append(channel)
+                continue
+
+            # 探测过程中部分抓取器会改写channel.url，缓存键需提前记录
+            self.probe_urls[id(channel)] = channel.url
+            targets.append(channel)
+        return targets
+
+    def record(self, accessible: List[IPTVChannel], tested: List[IPTVChannel]) -> None:
+        """将本次探测结果写入缓存与主机统计"""
+        alive_ids = {id(target) for target in accessible}
+        if self.host_stats is not None:
+            for target in tested:
+                self.host_stats.record(self.probe_urls[id(target)], id(target) in alive_ids)
+            self.host_stats.save()
+        if self.cache is None:
+            return
+        for target in tested:
+            alive = id(target) in alive_ids
+            if alive:
+                self.cache.put(self.probe_urls[id(target)], True, target.response_time,
+                               target.throughput, target.bandwidth)
+            else:
+                self.cache.put(self.probe_urls[id(target)], False)
+        self.cache.save()
+
+    def expand(self, targets: List[IPTVChannel]) -> List[IPTVChannel]:
+        """将唯一地址的测速结果展开到所有引用它的频道"""
+        channels = []
+        for target in targets:
+            group = self.groups.get(id(target), [target])
+            for channel in group:
+                channel.response_time = target.response_time
+                channel.throughput = target.throughput
+                channel.bandwidth = target.bandwidth
+            channels.extend(group)
+        return channels
+
+    def count(self, targets: List[IPTVChannel]) -> int:
+        return sum(len(self.groups.get(id(target), [target])) for target in targets)
+
+
+class _ProbeQueue:
+    """待探测队列：按预测的成功概率从高到低出队，同时限制每个主机的在途探测数"""
+
+    def __init__(self, score: Callable[[IPTVChannel], float] | None, per_host_limit: int):
+        self.score = score
+        self.per_host_limit = per_host_limit
+        self._heap = []
+        self._order = itertools.count()
+        # 主机在途探测已满的频道暂存于各主机自己的堆中，该主机有探测完成时再放回
+        self._parked: Dict[str, list] = defaultdict(list)
+        self._active: Dict[str, int] = defaultdict(int)
+        # 探测过程中部分抓取器会改写channel.url，出队时记录主机
+        self._hosts: Dict[int, str] = {}
+
+    def push(self, channels: List[IPTVChannel]) -> None:
+        for channel in channels:
+            priority = -self.score(channel) if self.score else 0
+            heapq.heappush(self._heap, (priority, next(self._order), channel))
+
+    def pop(self) -> IPTVChannel | None:
+        """取出可以立即探测的频道，没有时返回None"""
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            channel = item[2]
+            host = host_key(channel.url)
+            if self._active[host] >= self.per_host_limit:
+                heapq.heappush(self._parked[host], item)
+                continue
+            self._active[host] += 1
+            self._hosts[id(channel)] = host
+            return channel
+        return None
+
+    def release(self, channel: IPTVChannel) -> None:
+        """频道探测结束，释放其主机的配额"""
+        host = self._hosts.pop(id(channel))
+        self._active[host] -= 1
+        if self._parked[host]:
+            heapq.heappush(self._heap, heapq.heappop(self._parked[host]))
+
+
+def _read_next(batches: Iterator[List[IPTVChannel]]) -> Future:
+    """在守护线程中读取下一批频道，结果为None表示已读完。
+    测速提前结束时不等待仍在进行的抓取，也不阻止进程退出"""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def run() -> None:
+        try:
+            future.set_result(next(batches, None))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name='batch-reader', daemon=True).start()
+    return future
 
 
 class SpeedTester:
-    
-    def __init__(self, scraper: BaseIPTVScraper, progress_callback: Callable[[str, int, int], None] | None = None):
+    MODES = ('thread', 'async')
+
+    def __init__(self, scraper: BaseIPTVScraper, progress_callback: Callable[[str, int, int], None] | None = None,
+                 mode: str = SPEED_TEST_CONFIG['mode'], dedup: bool = SPEED_TEST_CONFIG['dedup'],
+                 use_cache: bool = PROBE_CACHE_CONFIG['enabled'], cache: ProbeCache | None = None,
+                 result_callback: Callable[[List[IPTVChannel]], None] | None = None,
+                 deep_probe: bool = SPEED_TEST_CONFIG['deep_probe'],
+                 time_budget: float | None = SPEED_TEST_CONFIG['time_budget'],
+                 prioritize: bool = PRIORITY_CONFIG['enabled'], limit: int | None = None):
+        if mode not in self.MODES:
+            raise ValueError(f"不支持的测速模式: {mode}")
         self.scraper = scraper
         self.progress_callback = progress_callback
-    
-    def test_channels(self, channels: List[IPTVChannel], max_workers: int = 20) -> Tuple[List[IPTVChannel], Dict[str, Any]]:
+        self.mode = mode
+        self.dedup = dedup
+        self.cache = (cache if cache is not None else get_default_cache()) if use_cache else None
+        # 每确认一个地址可用即回调，参数为引用该地址的频道列表，可能在工作线程中调用
+        self.result_callback = result_callback
+        # 深度测速：确认可用后再下载HLS分片测量吞吐量
+        self.hls_probe = HLSProbe(transport=scraper.transport, headers=getattr(scraper, 'headers', None),
+                                  proxies=self._scraper_proxies()) if deep_probe else None
+        # 时间预算：到达截止时间后中断在途请求，立即返回已完成的结果
+        self.time_budget = time_budget
+        # 按主机历史成功率、日期与分辨率预测成功概率，优先探测最可能可用的频道
+        self.host_stats = get_default_host_stats() if prioritize else None
+        # 找到limit个可用地址后停止测速
+        self.limit = limit
+
+    def test_channels(self, channels: List[IPTVChannel], max_workers: int = SPEED_TEST_CONFIG['max_workers'],
+                      mode: str | None = None) -> Tuple[List[IPTVChannel], Dict[str, Any]]:
         if not channels:
             logging.warning("没有频道可供测试")
             return [], {"total": 0, "accessible": 0}
-        
-        # 更新进度
-        if self.progress_callback:
-            self.progress_callback("开始测速", 0, len(channels))
-        
-        logging.info("开始测速检查频道可用性")
+        return self.test_stream([channels], max_workers, mode)
+
+    def test_stream(self, batches: Iterable[List[IPTVChannel]], max_workers: int = SPEED_TEST_CONFIG['max_workers'],
+                    mode: str | None = None) -> Tuple[List[IPTVChannel], Dict[str, Any]]:
+        """流水线测速：每收到一批频道立即开始探测，无需等待抓取全部完成"""
+        mode = mode or self.mode
+        if mode == 'async' and not AsyncProber.supports_proxies(self._scraper_proxies()):
+            logging.warning("异步测速仅支持HTTP代理，已切换为线程模式")
+            mode = 'thread'
+        if mode == 'async' and not self.scraper.supports_async_probe():
+            logging.warning(f"{self.scraper.name} 使用自定义的可用性检测，异步测速无法保持一致，已切换为线程模式")
+            mode = 'thread'
+
+        logging.info(f"开始测速检查频道可用性 (模式: {mode})")
+        plan = _ProbePlan(self.dedup, self.cache, self.hls_probe is not None, self.host_stats)
+        # 使用代理时由代理服务器解析域名，无需预解析
+        resolver = get_default_resolver() if DNS_CACHE_CONFIG['enabled'] and not self._scraper_proxies() else None
+        unresolved: List[IPTVChannel] = []
+
+        stop = threading.Event()
+        found = itertools.count(1)
+
+        def on_accessible(target: IPTVChannel) -> None:
+            if self.result_callback:
+                self.result_callback(plan.expand([target]))
+            if self.limit and next(found) >= self.limit:
+                stop.set()
+
+        # 批次在单独的线程中读取，测速结束后该线程可能仍在抓取；结束后不再修改测速计划
+        closed = threading.Event()
+        plan_lock = threading.Lock()
+
+        def target_batches() -> Iterator[List[IPTVChannel]]:
+            for batch in batches:
+                with plan_lock:
+                    if closed.is_set():
+                        return
+                    emitted = len(plan.cached_accessible)
+                    targets = plan.add(batch)
+                    cached = plan.cached_accessible[emitted:]
+                for target in cached:
+                    on_accessible(target)
+                if resolver is not None and targets:
+                    # 并发预解析本批次的主机名，无法解析的地址直接判定为不可用
+                    failed = set(resolver.prefetch(host_key(target.url) for target in targets))
+                    if failed:
+                        with plan_lock:
+                            if closed.is_set():
+                                return
+                            for target in targets:
+                                if host_key(target.url) in failed:
+                                    unresolved.append(target)
+                                    record_probe(self.scraper.source_name(target), 'dns')
+                        targets = [target for target in targets if host_key(target.url) not in failed]
+                yield targets
+
+        start_time = time.time()
+        deadline = time.monotonic() + self.time_budget if self.time_budget else None
+        # 测速结束（完成、到达limit或超时）时通过取消范围关闭仍在使用的连接
+        scope = CancelScope(deadline)
+        try:
+            if mode == 'async':
+                probed_accessible, probed_tested, aborted, skipped = asyncio.run(
+                    self._run_async(target_batches(), on_accessible, deadline, scope, stop))
+            else:
+                probed_accessible, probed_tested, aborted, skipped = self._run_threads(
+                    target_batches(), max_workers, on_accessible, deadline, scope, stop)
+        finally:
+            with plan_lock:
+                closed.set()
+        elapsed = time.time() - start_time
+        deadline_reached = deadline is not None and time.monotonic() >= deadline
+        if deadline_reached:
+            logging.info(f"已到达测速时间预算 {self.time_budget} 秒，中断 {aborted} 个进行中的探测，"
+                         f"跳过 {skipped} 个未开始的探测")
+        elif stop.is_set():
+            logging.info(f"已找到 {self.limit} 个可用地址，中断 {aborted} 个进行中的探测，跳过 {skipped} 个未开始的探测")
+        if unresolved:
+            logging.info(f"{len(unresolved)} 个地址的主机名无法解析，已跳过探测")
+            probed_tested = probed_tested + unresolved
+        plan.record(probed_accessible, probed_tested)
+
+        accessible_channels = plan.expand(plan.cached_accessible + probed_accessible)
+        tested = plan.count(plan.cached_tested + probed_tested)
+        cache_hits = len(plan.cached_tested)
+        if plan.unique < plan.total:
+            logging.info(f"去重后共 {plan.unique} 个唯一地址 (原始 {plan.total} 条)")
+        if self.cache is not None:
+            logging.info(f"测速缓存命中 {cache_hits} 个，探测 {len(probed_tested)} 个")
+
+        # 深度测速按能否流畅播放排序，否则按响应时间排序
+        if self.hls_probe is not None:
+            accessible_channels.sort(key=quality_key)
+        else:
+            accessible_channels.sort(key=lambda x: x.response_time)
+        logging.info(f"测速完成，共 {len(accessible_channels)}/{tested} 个频道可用 (总计 {plan.total} 个，耗时 {elapsed:.1f} 秒)")
+
+        return accessible_channels, {
+            "total": plan.total,
+            "unique": plan.unique,
+            "tested": tested,
+            "accessible": len(accessible_channels),
+            "mode": mode,
+            "elapsed": round(elapsed, 2),
+            "cache_hits": cache_hits,
+            "cache_misses": plan.unique - cache_hits,
+            "aborted": aborted,
+            "skipped": skipped,
+            "deadline_reached": deadline_reached,
+            "limit_reached": stop.is_set()
+        }
+
+    def _run_threads(self, target_batches: Iterator[List[IPTVChannel]], max_workers: int,
+                     on_accessible: Callable[[IPTVChannel], None], deadline: float | None,
+                     scope: CancelScope, stop: threading.Event) -> Tuple[List[IPTVChannel], List[IPTVChannel], int, int]:
         accessible_channels = []
-        total = len(channels)
+        tested_channels = []
         completed = 0
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # 提交所有任务并获取future对象
-            futures = {executor.submit(self._check_channel, channel): channel for channel in channels}
-            
+        scheduled = 0
+        futures = {}
+        pending = set()
+        # 按预测成功率调度，主机并发已满的频道暂存，不占用工作线程
+        probe_queue = _ProbeQueue(self._priority(), PROBE_POOL_CONFIG['per_host_limit'])
+
+        def dispatch(executor: ThreadPoolExecutor) -> None:
+            # 已找到足够的可用地址后不再提交新的探测
+            while len(pending) < max_workers and not stop.is_set():
+                channel = probe_queue.pop()
+                if channel is None:
+                    break
+                future = executor.submit(self._check_channel, channel, scope)
+                futures[future] = channel
+                pending.add(future)
+
+        def handle(future) -> None:
+            nonlocal completed
+            completed += 1
+            pending.discard(future)
+            channel = futures[future]
+            tested_channels.append(channel)
+            probe_queue.release(channel)
             try:
-                # 添加进度停滞检测
-                last_completed = 0
-                last_progress_time = time.time()
-                stall_timeout = 6 
-                
-                # 使用as_completed而不是设置总体超时
-                for future in as_completed(futures):
-                    # 检查是否停滞
-                    current_time = time.time()
-                    if completed > last_completed:
-                        last_completed = completed
-                        last_progress_time = current_time
-                    elif current_time - last_progress_time > stall_timeout:
-                        logging.info(f"测速进度已停滞 {stall_timeout} 秒，终止当前批次测试")
-                        break
-                    
+                channel, is_accessible = future.result(timeout=3)  # 单个任务超时
+                if is_accessible:
+                    accessible_channels.append(channel)
+                    on_accessible(channel)
+            except TimeoutError:
+                logging.info(f"任务执行超时")
+            except Exception as e:
+                logging.info(f"测速任务异常: {str(e)}")
+            finally:
+                if self.progress_callback:
+                    self.progress_callback("测速中", completed, scheduled)
+
+        def time_left() -> float | None:
+            return None if deadline is None else deadline - time.monotonic()
+
+        def finished() -> bool:
+            left = time_left()
+            return stop.is_set() or (left is not None and left <= 0)
+
+        # 不使用with语句：退出时不等待仍在运行的线程，超时后立即返回
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        # 抓取下一批频道可能耗时很长，在单独的线程中读取，等待期间仍能回收完成的探测并补充新任务，
+        # 也能及时响应时间预算与limit
+        reader = _read_next(target_batches)
+        try:
+            # 单个探测的耗时由请求超时限制，整体耗时由时间预算限制
+            while (reader is not None or pending) and not finished():
+                done, _ = wait(pending | ({reader} if reader is not None else set()),
+                               timeout=time_left(), return_when=FIRST_COMPLETED)
+                if not done:
+                    continue
+                if reader in done:
+                    targets = reader.result()
+                    if targets is None:
+                        reader = None
+                    else:
+                        probe_queue.push(targets)
+                        scheduled += len(targets)
+                        # 更新进度
+                        if self.progress_callback and targets and scheduled == len(targets):
+                            self.progress_callback("开始测速", 0, scheduled)
+                        reader = _read_next(target_batches)
+                for future in done & pending:
+                    handle(future)
+                dispatch(executor)
+        # 单个探测的异常在handle中处理；抓取频道时的异常由reader.result()抛出，与异步模式一样交给调用方
+        finally:
+            # 取消排队的任务，并关闭在途请求的连接使工作线程尽快退出
+            executor.shutdown(wait=False, cancel_futures=True)
+            scope.cancel()
+
+            # 更新进度
+            if self.progress_callback:
+                self.progress_callback("测速完成", completed, scheduled)
+
+        # 结束时仍在进行的探测被中断，其余已排队但未开始的探测被跳过
+        return accessible_channels, tested_channels, len(pending), scheduled - completed - len(pending)
+
+    async def _run_async(self, target_batches: Iterator[List[IPTVChannel]],
+                         on_accessible: Callable[[IPTVChannel], None], deadline: float | None,
+                         scope: CancelScope, stop: threading.Event) -> Tuple[List[IPTVChannel], List[IPTVChannel], int, int]:
+        """在单个事件循环中并发探测所有频道，频道批次在单独的线程中读取，不阻塞事件循环"""
+        accessible_channels = []
+        tested_channels = []
+        completed = 0
+        submitted = 0
+        prober = AsyncProber(
+            headers=getattr(self.scraper, 'headers', None),
+            proxies=self._scraper_proxies(),
+        )
+        concurrency = SPEED_TEST_CONFIG['async_concurrency']
+        probe_queue = _ProbeQueue(self._priority(), PROBE_POOL_CONFIG['per_host_limit'])
+        loop = asyncio.get_running_loop()
+        # 深度测速使用独立线程池，结束时不等待其中的线程，避免asyncio.run退出时阻塞
+        blocking = ThreadPoolExecutor(max_workers=SPEED_TEST_CONFIG['max_workers'])
+
+        async def check(channel: IPTVChannel) -> Tuple[IPTVChannel, float | None]:
+            # 事件循环中所有探测共用一个线程，不能使用按线程记录的stage()，直接记录结果与耗时
+            source = self.scraper.source_name(channel)
+            start = time.perf_counter()
+            response_time, outcome = await prober.probe_outcome(channel.url)
+            record_stage(source, 'probe', time.perf_counter() - start)
+            record_probe(source, outcome)
+            if response_time is not None and self.hls_probe is not None:
+                await loop.run_in_executor(blocking, self._measure_quality, channel, scope)
+            return channel, response_time
+
+        tasks = {}
+        pending = set()
+
+        def launch() -> None:
+            while len(pending) < concurrency and not stop.is_set():
+                channel = probe_queue.pop()
+                if channel is None:
+                    break
+                task = asyncio.ensure_future(check(channel))
+                tasks[task] = channel
+                pending.add(task)
+
+        reader = asyncio.wrap_future(_read_next(target_batches))
+        try:
+            while (reader is not None or pending) and not stop.is_set():
+                waiting = pending | ({reader} if reader is not None else set())
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    break
+                done, _ = await asyncio.wait(waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if reader in done:
+                    targets = reader.result()
+                    if targets is None:
+                        reader = None
+                    else:
+                        probe_queue.push(targets)
+                        submitted += len(targets)
+                        if self.progress_callback and targets and submitted == len(targets):
+                            self.progress_callback("开始测速", 0, submitted)
+                        reader = asyncio.wrap_future(_read_next(target_batches))
+
+                for task in done & pending:
+                    pending.discard(task)
                     completed += 1
+                    probe_queue.release(tasks.pop(task))
                     try:
-                        channel, is_accessible = future.result(timeout=3)  # 单个任务超时
-                        if is_accessible:
+                        channel, response_time = task.result()
+                        tested_channels.append(channel)
+                        if response_time is not None:
+                            channel.response_time = response_time
                             accessible_channels.append(channel)
-                    except TimeoutError:
-                        logging.info(f"任务执行超时")
+                            on_accessible(channel)
                     except Exception as e:
                         logging.info(f"测速任务异常: {str(e)}")
                     finally:
                         if self.progress_callback:
-                            self.progress_callback("测速中", completed, total)
-            except Exception as e:
-                logging.info(f"测速过程发生异常: {str(e)}")
-            finally:
-                # 强制关闭所有任务
-                for future in futures:
-                    future.cancel()
-                
-                executor.shutdown(wait=False, cancel_futures=True)
-                futures.clear()
-                
-                # 更新进度
-                if self.progress_callback:
-                    self.progress_callback("测速完成", completed, total)
-        
-        # 按响应时间排序
-        accessible_channels.sort(key=lambda x: x.response_time)
-        logging.info(f"测速完成，共 {len(accessible_channels)}/{completed} 个频道可用 (总计 {total} 个)")
-        
-        return accessible_channels, {
-            "total": total,
-            "tested": completed,
-            "accessible": len(accessible_channels)
-        }
-    
-    def _check_channel(self, channel: IPTVChannel) -> Tuple[IPTVChannel, bool]:
-        is_accessible = self.scraper.check_channel_availability(channel)
-        return channel, is_accessible
\ No newline at end of file
+                            self.progress_callback("测速中", completed, submitted)
+                launch()
+        finally:
+            # 取消任务会关闭其连接；仍在读取的批次直接放弃
+            for task in pending:
+                task.cancel()
+                record_probe(self.scraper.source_name(tasks[task]), 'cancelled')
+            if reader is not None:
+                reader.cancel()
+            prober.close()
+            scope.cancel()
+            blocking.shutdown(wait=False, cancel_futures=True)
+            if self.progress_callback:
+                self.progress_callback("测速完成", completed, submitted)
+
+        return accessible_channels, tested_channels, len(pending), submitted - completed - len(pending)
+
+    def _priority(self) -> Callable[[IPTVChannel], float] | None:
+        """按预测成功率排序时使用的评分函数，未启用时按抓取顺序探测"""
+        if self.host_stats is None:
+            return None
+        return SuccessPredictor(self.host_stats).score
+
+    def _scraper_proxies(self) -> Dict[str, str] | None:
+        return self.scraper.proxies if self.scraper.proxy_enabled else None
+
+    def _check_channel(self, channel: IPTVChannel, scope: CancelScope | None = None) -> Tuple[IPTVChannel, bool]:
+        source = self.scraper.source_name(channel)
+        with activate(scope):
+            with stage(source, 'probe'):
+                is_accessible = self.scraper.check_channel_availability(channel)
+                failure = last_failure()
+            if is_accessible:
+                record_probe(source, 'ok')
+            else:
+                record_probe(source, 'cancelled' if scope is not None and scope.cancelled else failure or 'other')
+            if is_accessible and self.hls_probe is not None:
+                with stage(source, 'deep_probe'):
+                    self.hls_probe.measure(channel)
+        return channel, is_accessible
+
+    def _measure_quality(self, channel: IPTVChannel, scope: CancelScope | None = None) -> bool:
+        with activate(scope), stage(self.scraper.source_name(channel), 'deep_probe'):
+            return self.hls_probe.measure(channel)
@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from base_scraper import IPTVChannel
+from config import PRIORITY_CONFIG
+from url_utils import host_key
+
+_FULL_DATE_RE = re.compile(r'(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})')
+_SHORT_DATE_RE = re.compile(r'(?<!\d)(\d{1,2})[-/.月](\d{1,2})(?!\d)')
+_RELATIVE_RE = re.compile(r'(\d+)\s*(分钟|小时|天|周|个月|月)前')
+_RELATIVE_DAYS = {'分钟': 1 / 1440, '小时': 1 / 24, '天': 1, '周': 7, '个月': 30, '月': 30}
+_RESOLUTION_RE = re.compile(r'(\d{3,4})\s*[xX×*]\s*(\d{3,4})|(\d{3,4})[pP]')
+
+
+def parse_age_days(date: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """将数据源给出的日期（2024-05-01、05-01、3天前等）转换为距今的天数，无法识别时返回None"""
+    if not date:
+        return None
+    now = now or datetime.now()
+    match = _RELATIVE_RE.search(date)
+    if match:
+        return int(match.group(1)) * _RELATIVE_DAYS[match.group(2)]
+    try:
+        match = _FULL_DATE_RE.search(date)
+        if match:
+            parsed = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        else:
+            match = _SHORT_DATE_RE.search(date)
+            if not match:
+                return None
+            parsed = datetime(now.year, int(match.group(1)), int(match.group(2)))
+            # 没有年份的日期若晚于今天，视为去年
+            if parsed > now:
+                parsed = parsed.replace(year=now.year - 1)
+    except ValueError:
+        return None
+    return max(0.0, (now - parsed).total_seconds() / 86400)
+
+
+def parse_height(resolution: Optional[str]) -> Optional[int]:
+    """从 1920x1080、1080p 等格式中取出画面高度"""
+    if not resolution:
+        return None
+    match = _RESOLUTION_RE.search(resolution)
+    if not match:
+        return None
+    return int(match.group(2) or match.group(3))
+
+
+class HostStats:
+    """按主机持久化的历史探测成功次数，用于估计下次探测的成功率"""
+
+    def __init__(self, filepath: str | None = PRIORITY_CONFIG['filename'],
+                 max_attempts: int = PRIORITY_CONFIG['max_attempts']):
+        self.filepath = filepath
+        self.max_attempts = max_attempts
+        # 主机名 -> [成功次数, 探测次数]
+        self._hosts: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.filepath or not os.path.exists(self.filepath):
+            return
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self._hosts = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"主机统计读取失败，将重新建立: {str(e)}")
+            self._hosts = {}
+
+    def record(self, url: str, alive: bool) -> None:
+        host = host_key(url)
+        with self._lock:
+            stats = self._hosts.setdefault(host, [0, 0])
+            stats[0] += 1 if alive else 0
+            stats[1] += 1
+            # 次数过多时减半，让近期结果占更大权重
+            if stats[1] > self.max_attempts:
+                stats[0] /= 2
+                stats[1] /= 2
+
+    def success_rate(self, url: str) -> float:
+        """拉普拉斯平滑后的成功率，没有历史记录的主机为0.5"""
+        with self._lock:
+            successes, attempts = self._hosts.get(host_key(url), (0, 0))
+        return (successes + 1) / (attempts + 2)
+
+    def save(self) -> None:
+        if not self.filepath:
+            return
+        with self._lock:
+            hosts = dict(self._hosts)
+        try:
+            with open(self.filepath, 'w', encoding='utf-8') as f:
+                json.dump(hosts, f)
+        except OSError as e:
+            logging.warning(f"主机统计写入失败: {str(e)}")
+
+
+class SuccessPredictor:
+    """综合主机历史成功率、数据源日期与分辨率估计频道可用的概率，用于决定探测顺序"""
+
+    def __init__(self, host_stats: HostStats, weights: Dict[str, float] = PRIORITY_CONFIG['weights'],
+                 half_life_days: float = PRIORITY_CONFIG['date_half_life']):
+        self.host_stats = host_stats
+        self.weights = weights
+        self.half_life_days = half_life_days
+        self._now = datetime.now()
+
+    def score(self, channel: IPTVChannel) -> float:
+        """返回0~1之间的估计值，越大越先探测"""
+        age = parse_age_days(channel.date, self._now)
+        # 日期越新越可能可用，每过half_life_days天减半；没有日期时取中间值
+        freshness = 0.5 if age is None else 0.5 ** (age / self.half_life_days)
+        # 数据源给出分辨率说明近期被成功解码过
+        resolution = 1.0 if parse_height(channel.resolution) else 0.5
+        return (self.weights['host'] * self.host_stats.success_rate(channel.url)
+                + self.weights['date'] * freshness
+                + self.weights['resolution'] * resolution)
+
+
+_default_stats: HostStats | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_host_stats() -> HostStats:
+    """进程内共享的主机统计"""
+    global _default_stats
+    with _default_lock:
+        if _default_stats is None:
+            _default_stats = HostStats()
+        return _default_stats
@@ -4,14 +4,17 @@ import random
 import logging
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from parsing import make_soup
+from typing import Iterator, List, Dict, Any
 from base_scraper import BaseIPTVScraper, IPTVChannel
+from transport import Transport
+from host_timeouts import observe_probe, probe_timeout
+from metrics import mark_failure
 from config import TONKIANG_HEADERS
 
 class TonkiangScraper(BaseIPTVScraper):
-    def __init__(self):
-        super().__init__()
-        self.session = requests.Session()
+    def __init__(self, transport: Transport | None = None):
+        super().__init__(transport)
         self.base_url = 'https://tonkiang.us'
         self.headers = TONKIANG_HEADERS
 
@@ -22,11 +25,12 @@ class TonkiangScraper(BaseIPTVScraper):
             'user-agent': self.headers['User-Agent'],
         }
         try:
-            response = self.session.get(
-                f"{self.base_url}/ga.php?s=ai&c=ch",
-                headers=ac_headers,
-                proxies=self.proxies if self.proxy_enabled else None,
-            )
+            with self._stage('city_lookup'):
+                response = self.session.get(
+                    f"{self.base_url}/ga.php?s=ai&c=ch",
+                    headers=ac_headers,
+                    proxies=self.proxies if self.proxy_enabled else None,
+                )
             city = response.text.strip()
             logging.info(f"成功获取动态city参数: {city}")  # 添加日志
             return city
@@ -34,9 +38,9 @@ class TonkiangScraper(BaseIPTVScraper):
             logging.error(f"获取city参数失败: {e}")
             raise
 
-    def _extract_channels_from_html(self, html: str) -> List[IPTVChannel]:
+    def _extract_channels_from_html(self, html: str | BeautifulSoup) -> List[IPTVChannel]:
         channels = []
-        soup = BeautifulSoup(html, 'html.parser')
+        soup = make_soup(html, self.parser_backend)
         
         for resultplus_div in soup.find_all('div', class_='resultplus'):
             tba_tags = resultplus_div.find_all('tba')
@@ -75,50 +79,61 @@ class TonkiangScraper(BaseIPTVScraper):
 
         return channels
 
-    def fetch_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> List[IPTVChannel]:
-        channels = []
-        logging.info("开始提取频道信息")  # 添加日志
+    def _open_search(self, keyword: str):
+        """提交搜索，返回 (第一页频道, l参数, 总页数)，失败时返回None"""
         city = self._get_city_param()
-        
+
         # 获取第一页和l参数
         post_data = {"seerch": keyword, "Submit": "+", "city": city}
-        response = self.session.post(
-            self.base_url,
-            headers=self.headers,
-            data=post_data,
-            proxies=self.proxies if self.proxy_enabled else None
-        )
+        with self._stage('page_fetch'):
+            response = self.session.post(
+                self.base_url,
+                headers=self.headers,
+                data=post_data,
+                proxies=self.proxies if self.proxy_enabled else None
+            )
 
         if response.status_code != 200:
             logging.error(f"请求失败，状态码: {response.status_code}")  # 添加日志
-            return channels
+            return None
+
+        with self._stage('parse'):
+            # 解析第一页，频道与总页数共用同一次解析结果
+            soup = make_soup(response.text, self.parser_backend)
+            page_channels = self._extract_channels_from_html(soup)
+
+            # 提取l参数
+            match = re.search(r'l=([a-f0-9]{9,})', response.text)
+            l_param = match.group(1) if match else None
+
+            # 获取实际的总页数
+            max_available_pages = self._get_max_pages(soup)
+        self._put_cached_page(keyword, 1, page_channels, max_pages=max_available_pages, paged=l_param is not None)
+        return page_channels, l_param, max_available_pages
 
-        # 解析第一页
-        soup = BeautifulSoup(response.text, 'html.parser')
-        page_channels = self._extract_channels_from_html(response.text)
-        channels.extend(page_channels)
-        logging.info(f"第 1 页请求完毕，获取到 {len(page_channels)} 条数据，共 {page_count} 页")  # 添加日志
+    def iter_channels(self, keyword: str, page_count: int, random_mode: bool = True) -> Iterator[List[IPTVChannel]]:
+        logging.info("开始提取频道信息")  # 添加日志
+
+        l_param = None
+        cached = self._get_cached_page(keyword, 1)
+        if cached is not None:
+            page_channels, meta = cached
+            max_available_pages, paged = meta['max_pages'], meta['paged']
+            logging.info(f"第 1 页命中搜索缓存，获取到 {len(page_channels)} 条数据")
+        else:
+            search = self._open_search(keyword)
+            if search is None:
+                return
+            page_channels, l_param, max_available_pages = search
+            paged = l_param is not None
+            logging.info(f"第 1 页请求完毕，获取到 {len(page_channels)} 条数据，共 {page_count} 页")  # 添加日志
+        yield page_channels
 
-        # 提取l参数
-        match = re.search(r'l=([a-f0-9]{9,})', response.text)
-        if not match:
+        if not paged:
             logging.warning("未找到l参数，无法获取更多页面")  # 添加日志
-            return channels
-        
-        l_param = match.group(1)
-        
-        # 获取实际的总页数
-        max_available_pages = self._get_max_pages(soup)
+            return
 
         if page_count > 1:
-            base_visit_url = f'{self.base_url}/?iptv={keyword}&l={l_param}'
-            self.session.get(
-                base_visit_url, 
-                headers=self.headers,
-                proxies=self.proxies if self.proxy_enabled else None
-            )
-            time.sleep(0.5)
-            
             # 确定要获取的页面
             if random_mode:
                 available_pages = list(range(2, max_available_pages + 1))
@@ -130,24 +145,55 @@ class TonkiangScraper(BaseIPTVScraper):
                 logging.info(f"随机模式已启用，将从 {max_available_pages} 页中随机抓取以下页面：{pages_to_fetch}")  # 添加日志
             else:
                 pages_to_fetch = range(2, min(page_count + 1, max_available_pages + 1))
-        
-            # 获取其他页面
+
+            missing_pages = []
             for page in pages_to_fetch:
-                url = f'{self.base_url}/?page={page}&iptv={keyword}&l={l_param}'
-                response = self.session.get(
-                    url,
-                    headers=self.headers,
-                    proxies=self.proxies if self.proxy_enabled else None
-                )
-                
-                if response.status_code == 200:
-                    page_channels = self._extract_channels_from_html(response.text)
-                    channels.extend(page_channels)
-                    logging.info(f"第 {page} 页请求完毕，获取到 {len(page_channels)} 条数据")  # 添加日志
+                cached = self._get_cached_page(keyword, page)
+                if cached is not None:
+                    logging.info(f"第 {page} 页命中搜索缓存，获取到 {len(cached[0])} 条数据")
+                    yield cached[0]
                 else:
-                    logging.error(f"第 {page} 页请求失败，状态码: {response.status_code}")  # 添加日志
+                    missing_pages.append(page)
+
+            # l参数与会话绑定，缓存的第一页无法复用，需重新提交搜索
+            if missing_pages and l_param is None:
+                search = self._open_search(keyword)
+                l_param = search[1] if search else None
+                if l_param is None:
+                    logging.warning("未找到l参数，无法获取更多页面")
+                    missing_pages = []
+
+            if missing_pages:
+                base_visit_url = f'{self.base_url}/?iptv={keyword}&l={l_param}'
+                with self._stage('page_fetch'):
+                    self.session.get(
+                        base_visit_url,
+                        headers=self.headers,
+                        proxies=self.proxies if self.proxy_enabled else None
+                    )
+                time.sleep(0.5)
         
-        return channels
+            # 并发获取其他页面
+            def fetch_page(page: int):
+                url = f'{self.base_url}/?page={page}&iptv={keyword}&l={l_param}'
+                with self._stage('page_fetch'):
+                    response = self.session.get(
+                        url,
+                        headers=self.headers,
+                        proxies=self.proxies if self.proxy_enabled else None
+                    )
+
+                if response.status_code != 200:
+                    logging.error(f"第 {page} 页请求失败，状态码: {response.status_code}")  # 添加日志
+                    return None
+                with self._stage('parse'):
+                    page_channels = self._extract_channels_from_html(response.text)
+                self._put_cached_page(keyword, page, page_channels)
+                logging.info(f"第 {page} 页请求完毕，获取到 {len(page_channels)} 条数据")  # 添加日志
+                return page_channels
+
+            for _, page_channels in self._iter_pages(missing_pages, fetch_page):
+                yield page_channels
 
     def check_channel_availability(self, channel: IPTVChannel) -> bool:
         """检查频道可用性"""
@@ -156,10 +202,12 @@ class TonkiangScraper(BaseIPTVScraper):
             response = self.session.get(
                 channel.url,
                 headers=self.headers,
-                timeout=(3.05, 4.5),
+                timeout=probe_timeout(channel.url),
                 proxies=self.proxies if self.proxy_enabled else None,
                 stream=True
             )
+            # 记录首字节耗时，用于调整该主机后续的超时
+            observe_probe(channel.url, response.elapsed.total_seconds())
 
             if response.status_code not in (200, 206):
                 logging.debug(f"无效响应[{response.status_code}]: {channel.url}")  # 添加日志
@@ -167,6 +215,7 @@ class TonkiangScraper(BaseIPTVScraper):
 
             chunk = response.raw.read(512, decode_content=True)
             if not chunk:
+                mark_failure('empty_body')
                 logging.debug(f"空数据响应: {channel.url}")  # 添加日志
                 return False
 
@@ -177,6 +226,10 @@ class TonkiangScraper(BaseIPTVScraper):
             response_time = time.time() - start_time
             channel.response_time = response_time
             return True
+        except requests.exceptions.Timeout as e:
+            observe_probe(channel.url, None)
+            logging.debug(f"连接超时 {channel.url}: {str(e)}")
+            return False
         except Exception as e:
             logging.debug(f"连接错误 {channel.url}: {str(e)}")  # 添加日志
             return False
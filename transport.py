@@ -0,0 +1,88 @@
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from urllib3.util import Retry
+
+from cancellation import CancellableHTTPAdapter
+from config import PROBE_POOL_CONFIG, TRANSPORT_CONFIG
+from metrics import record_error, record_response
+
+
+class _MeteredSession(requests.Session):
+    """记录每个请求的状态码、耗时、字节数与失败类型，计入当前线程所处的数据源与阶段"""
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException as e:
+            record_error(e, time.perf_counter() - start)
+            raise
+        record_response(response, time.perf_counter() - start, bool(kwargs.get('stream')))
+        return response
+
+
+class Transport:
+    """所有抓取器共用的HTTP传输层：统一管理连接池、重试策略与代理。
+    requests.Session并非线程安全，每个线程使用各自的Session，但共享同一个连接池和Cookie"""
+
+    def __init__(self, pool_connections: int = PROBE_POOL_CONFIG['pool_hosts'],
+                 pool_maxsize: int = PROBE_POOL_CONFIG['pool_maxsize'],
+                 retries: int = TRANSPORT_CONFIG['retries'],
+                 backoff_factor: float = TRANSPORT_CONFIG['backoff_factor']):
+        retry_strategy = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=TRANSPORT_CONFIG['status_forcelist']
+        )
+        # 按主机缓存连接池，测速地址分布在大量主机上时仍能复用长连接
+        self.adapter = CancellableHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                              max_retries=retry_strategy)
+        self.cookies = requests.cookies.RequestsCookieJar()
+        self.proxies: Optional[Dict[str, str]] = None
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """当前线程的Session"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = _MeteredSession()
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            session.cookies = self.cookies
+            self._local.session = session
+        return session
+
+    @property
+    def proxy_enabled(self) -> bool:
+        return self.proxies is not None
+
+    def set_proxy(self, proxy_url: str, proxy_type: str = 'http') -> None:
+        """设置代理服务器，proxy_url为空时取消代理"""
+        if not proxy_url:
+            self.proxies = None
+            return
+        self.proxies = {
+            'http': f'{proxy_type}://{proxy_url}',
+            'https': f'{proxy_type}://{proxy_url}'
+        }
+
+    def close(self) -> None:
+        """关闭所有连接池"""
+        self.adapter.close()
+
+
+_default_transport: Transport | None = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> Transport:
+    """进程内共享的传输层，未单独指定传输层的抓取器都使用它"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from base_scraper import IPTVChannel
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtmp': 1935, 'rtsp': 554, 'mms': 1755}
+
+# 不影响播放的统计类参数
+TRACKING_PARAMS = {'spm', 'fbclid', 'gclid', 'ref'}
+TRACKING_PREFIXES = ('utm_',)
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def host_key(url: str) -> str:
+    """返回URL的主机名，用于按主机限制并发，同一机器的不同端口视为同一主机"""
+    try:
+        return (urlsplit(url.strip()).hostname or '').lower()
+    except ValueError:
+        return ''
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化URL，用于判断不同频道条目是否指向同一个播放地址"""
+    url = url.strip()
+    # 去除播放列表中常见的 $线路名 后缀
+    if '$' in url:
+        url = url.split('$', 1)[0]
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.hostname:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname.lower()
+    if ':' in host:
+        host = f'[{host}]'
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{port}'
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += f':{parts.password}'
+        host = f'{userinfo}@{host}'
+
+    query = parts.query
+    if query:
+        params = parse_qsl(query, keep_blank_values=True)
+        kept = [(name, value) for name, value in params if not _is_tracking_param(name)]
+        if len(kept) != len(params):
+            query = urlencode(kept)
+
+    return urlunsplit((scheme, host, parts.path or '/', query, ''))
+
+
+class ChannelIndex:
+    """以规范化URL为键的频道索引，记录每个播放地址对应的全部频道条目"""
+
+    def __init__(self, channels: Iterable[IPTVChannel] = ()):
+        self._groups: Dict[str, List[IPTVChannel]] = OrderedDict()
+        for channel in channels:
+            self.add(channel)
+
+    def add(self, channel: IPTVChannel) -> str:
+        key = canonicalize_url(channel.url)
+        self._groups.setdefault(key, []).append(channel)
+        return key
+
+    def get(self, url: str) -> List[IPTVChannel]:
+        return self._groups.get(canonicalize_url(url), [])
+
+    def group(self, key: str) -> List[IPTVChannel]:
+        """按规范化URL取出引用它的全部频道"""
+        return self._groups[key]
+
+    def representatives(self) -> List[IPTVChannel]:
+        """每个唯一播放地址取第一个频道条目作为探测对象"""
+        return [group[0] for group in self._groups.values()]
+
+    def groups(self) -> Iterator[Tuple[str, List[IPTVChannel]]]:
+        return iter(self._groups.items())
+
+    def __len__(self) -> int:
+        return len(self._groups)